@@ -3,29 +3,26 @@ import sys
 import time
 import socket
 import struct
+import functools
+
+from crc_check import calculate_crc16
+
+_HDR_STRUCT = struct.Struct('<HBHHB')
+_CRC_STRUCT = struct.Struct('<H')
 
 # Helper to build packet manually
+# seq is fixed at 0, so the packet depends only on (cmd_id, data) and can be cached
+@functools.lru_cache(maxsize=64)
 def build_packet(cmd_id, data):
     STX = 0x6655
     CTRL = 1 # ACK_PACK
     seq = 0
     data_len = len(data)
     
-    packet = struct.pack('<HBHHB', STX, CTRL, data_len, seq, cmd_id)
-    packet += data
+    packet = _HDR_STRUCT.pack(STX, CTRL, data_len, seq, cmd_id) + data
     
-    # Simple CRC
-    crc = 0
-    for byte in packet:
-        crc ^= (byte << 8)
-        for _ in range(8):
-            if crc & 0x8000:
-                crc = (crc << 1) ^ 0x1021
-            else:
-                crc = crc << 1
-            crc &= 0xFFFF
-            
-    packet += struct.pack('<H', crc)
+    crc = calculate_crc16(packet)
+    packet += _CRC_STRUCT.pack(crc)
     return packet
 
 def test_connection_and_zoom(ip, port):
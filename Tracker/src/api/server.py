@@ -1,10 +1,10 @@
+import asyncio
 import threading
-from fastapi import FastAPI, HTTPException, Response
+from fastapi import FastAPI, HTTPException, Response, Depends
 from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-import cv2
-import time
 import io
+from typing import NamedTuple, Tuple
 from pydantic import BaseModel
 from src.core.app import TrackingApp
 from src.core.config import cfg
@@ -50,6 +50,19 @@ class HoldPoint(BaseModel):
 class TrackStatus(BaseModel):
     trackingStatus: bool
 
+class StateSnap(NamedTuple):
+    tracker: TrackingApp
+    hw: Tuple[int, int]
+
+def get_state() -> StateSnap:
+    """
+    Per-request snapshot of the tracker and its latest (height, width) frame size.
+    """
+    app_ref = tracker_app
+    if app_ref is None:
+        raise HTTPException(status_code=503, detail="Tracker not initialized")
+    return StateSnap(app_ref, app_ref.frame_hw)
+
 # -----------------------
 # Lifecycle
 # -----------------------
@@ -58,7 +71,7 @@ async def startup_event():
     global tracker_app
     logger.info("Starting Tracker App in background...")
     # Force headless in API mode
-    cfg._config['system']['headless'] = True
+    cfg.set('system.headless', True)
     tracker_app = TrackingApp(mode="production")
     tracker_app.start_threaded()
 
@@ -72,59 +85,41 @@ async def shutdown_event():
 # APIs
 # -----------------------
 @app.post("/track_point")
-def track_point(data: TrackPoint):
+def track_point(data: TrackPoint, st: StateSnap = Depends(get_state)):
     logger.info(f"📍 Track Point: {data}")
     
-    if not tracker_app:
-         raise HTTPException(status_code=503, detail="Tracker not initialized")
-
-    # Access current frame dimensions from config or tracker_app
+    # Access current frame dimensions from the request snapshot
     # Note: data.video_width/height are from client, might differ from actual stream
     # We use normalized coords so we multiply by OUR stream dimensions
     
-    # We assume standard HD default if camera not ready, but better to get from config
-    stream_w = cfg.get("camera.width", 1280)
-    stream_h = cfg.get("camera.height", 720)
-    
-    # Check if we can get actual dimensions from camera
-    if hasattr(tracker_app, 'camera') and tracker_app.camera.frame is not None:
-        stream_h, stream_w = tracker_app.camera.frame.shape[:2]
+    # Latest frame dimensions (config defaults until the camera delivers a frame)
+    stream_h, stream_w = st.hw
 
     x = int(data.x_norm * stream_w)
     y = int(data.y_norm * stream_h)
 
     # Check for click on detected object
     selected_bbox = None
-    if hasattr(tracker_app, 'latest_detections'):
-        for label, conf, det_bbox in tracker_app.latest_detections:
-            dx, dy, dw, dh = [int(v) for v in det_bbox]
-            if dx <= x <= dx + dw and dy <= y <= dy + dh:
-                logger.info(f"🎯 API Click selected object: {label} ({conf:.2f})")
-                selected_bbox = (dx, dy, dw, dh)
-                break
+    hit = st.tracker.find_detection_at(x, y)
+    if hit is not None:
+        label, conf, selected_bbox = hit
+        logger.info(f"🎯 API Click selected object: {label} ({conf:.2f})")
     
     if selected_bbox:
-        tracker_app.set_tracking_target(selected_bbox)
+        st.tracker.set_tracking_target(selected_bbox)
     else:
         # Strict mode: Do not track if no object is clicked
-        logger.warning(f"📍 API Click at ({x}, {y}) did not hit any of {len(tracker_app.latest_detections) if hasattr(tracker_app, 'latest_detections') else 0} objects. Tracking NOT started.")
+        logger.warning(f"📍 API Click at ({x}, {y}) did not hit any of {len(st.tracker.latest_detections[2])} objects. Tracking NOT started.")
         # Optional: return 404 or specific status? For now, 200 but no action.
     
     return {"status": "ok"}
 
 
 @app.post("/drag_point")
-def drag_point(data: DragPoint):
+def drag_point(data: DragPoint, st: StateSnap = Depends(get_state)):
     logger.info(f"⬛ Drag Selection: {data}")
 
-    if not tracker_app:
-         raise HTTPException(status_code=503, detail="Tracker not initialized")
-
-    stream_w = cfg.get("camera.width", 1280)
-    stream_h = cfg.get("camera.height", 720)
-    
-    if hasattr(tracker_app, 'camera') and tracker_app.camera.frame is not None:
-        stream_h, stream_w = tracker_app.camera.frame.shape[:2]
+    stream_h, stream_w = st.hw
 
     # Calculate bbox
     # Ensure x1 < x2, y1 < y2
@@ -139,119 +134,89 @@ def drag_point(data: DragPoint):
     h = int(h_norm * stream_h)
 
     bbox = (x, y, w, h)
-    tracker_app.set_tracking_target(bbox)
+    st.tracker.set_tracking_target(bbox)
     return {"status": "ok"}
 
 
 @app.post("/hold_point")
-def hold_point(data: HoldPoint):
+def hold_point(data: HoldPoint, st: StateSnap = Depends(get_state)):
     # logger.info(f"📍 Hold Point: {data}")
     
-    if not tracker_app:
-         raise HTTPException(status_code=503, detail="Tracker not initialized")
-
-    # Use tracker_app to handle the hold logic
+    # Use the tracker app to handle the hold logic
     # We pass the normalized coordinates and let the app handle the conversion to frame pixels
-    tracker_app.hold_at_point(data.hold_x, data.hold_y)
+    st.tracker.hold_at_point(data.hold_x, data.hold_y)
     
     return {"status": "ok"}
 
 
 @app.post("/track_status")
-def set_track_status(data: TrackStatus):
+def set_track_status(data: TrackStatus, st: StateSnap = Depends(get_state)):
     logger.info(f"🎯 Set Tracking Enabled: {data.trackingStatus}")
     
-    if not tracker_app:
-         raise HTTPException(status_code=503, detail="Tracker not initialized")
-
     if data.trackingStatus:
         # We can't really "enable" tracking without a target via this endpoint usually
         # But maybe this is a master switch. 
         # For now, if False, we cancel tracking
         pass 
     else:
-        tracker_app.stop_tracking_without_center()
+        st.tracker.stop_tracking_without_center()
 
     return {"enabled": data.trackingStatus}
 
 
 @app.post("/clear_track")
-def clear_track():
+def clear_track(st: StateSnap = Depends(get_state)):
     logger.info("🚫 API: Clear Track")
-    if not tracker_app:
-         raise HTTPException(status_code=503, detail="Tracker not initialized")
-    
-    tracker_app.stop_tracking_without_center()
+    st.tracker.stop_tracking_without_center()
     return {"status": "ok"}
 
 
 @app.post("/center")
-def center_gimbal():
+def center_gimbal(st: StateSnap = Depends(get_state)):
     logger.info("🎯 API: Center Gimbal")
-    if not tracker_app:
-         raise HTTPException(status_code=503, detail="Tracker not initialized")
-    
-    tracker_app.center_gimbal()
+    st.tracker.center_gimbal()
     return {"status": "ok"}
 
 
 @app.post("/zoom_in")
-def zoom_in():
+def zoom_in(st: StateSnap = Depends(get_state)):
     logger.info("🔍 API: Zoom In")
-    if not tracker_app:
-         raise HTTPException(status_code=503, detail="Tracker not initialized")
-    
-    tracker_app.zoom_in()
+    st.tracker.zoom_in()
     return {"status": "ok"}
 
 
 @app.post("/zoom_out")
-def zoom_out():
+def zoom_out(st: StateSnap = Depends(get_state)):
     logger.info("🔍 API: Start Zoom Out")
-    if not tracker_app:
-         raise HTTPException(status_code=503, detail="Tracker not initialized")
-    
-    tracker_app.zoom_out()
+    st.tracker.zoom_out()
     return {"status": "ok"}
 
 
 @app.post("/stop_zoom")
-def stop_zoom():
+def stop_zoom(st: StateSnap = Depends(get_state)):
     logger.info("🔍 API: Stop Zoom")
-    if not tracker_app:
-         raise HTTPException(status_code=503, detail="Tracker not initialized")
-    
-    tracker_app.stop_zoom()
+    st.tracker.stop_zoom()
     return {"status": "ok"}
 
 
 @app.post("/take_photo")
-def take_photo():
+def take_photo(st: StateSnap = Depends(get_state)):
     logger.info("📸 API: Take Photo")
-    if not tracker_app:
-         raise HTTPException(status_code=503, detail="Tracker not initialized")
-    
-    tracker_app.take_photo()
+    st.tracker.take_photo()
     return {"status": "ok"}
 
 
 @app.post("/start_recording")
-def start_recording():
+def start_recording(st: StateSnap = Depends(get_state)):
     logger.info("🎥 API: Start Recording")
-    if not tracker_app:
-         raise HTTPException(status_code=503, detail="Tracker not initialized")
-    
-    tracker_app.start_recording()
+    st.tracker.start_recording()
     return {"status": "ok"}
 
 
 @app.post("/stop_recording")
-def stop_recording():
+def stop_recording(st: StateSnap = Depends(get_state)):
     logger.info("🎥 API: Stop Recording")
-    if not tracker_app:
-         raise HTTPException(status_code=503, detail="Tracker not initialized")
-    
-    tracker_app.stop_recording()
+    st.tracker.stop_recording()
     return {"status": "ok"}
 
 
@@ -260,38 +225,33 @@ def stop_recording():
 GIMBAL_SPEED = 15
 
 @app.post("/pitch_up")
-def pitch_up():
+def pitch_up(st: StateSnap = Depends(get_state)):
     logger.info("⬆️ API: Pitch Up")
-    if not tracker_app: raise HTTPException(status_code=503, detail="Tracker not initialized")
-    tracker_app.move_gimbal(0, GIMBAL_SPEED) # Positive pitch is typically Up/Down depending on mount
+    st.tracker.move_gimbal(0, GIMBAL_SPEED) # Positive pitch is typically Up/Down depending on mount
     return {"status": "ok"}
 
 @app.post("/pitch_down")
-def pitch_down():
+def pitch_down(st: StateSnap = Depends(get_state)):
     logger.info("⬇️ API: Pitch Down")
-    if not tracker_app: raise HTTPException(status_code=503, detail="Tracker not initialized")
-    tracker_app.move_gimbal(0, -GIMBAL_SPEED)
+    st.tracker.move_gimbal(0, -GIMBAL_SPEED)
     return {"status": "ok"}
 
 @app.post("/yaw_left")
-def yaw_left():
+def yaw_left(st: StateSnap = Depends(get_state)):
     logger.info("⬅️ API: Yaw Left")
-    if not tracker_app: raise HTTPException(status_code=503, detail="Tracker not initialized")
-    tracker_app.move_gimbal(-GIMBAL_SPEED, 0)
+    st.tracker.move_gimbal(-GIMBAL_SPEED, 0)
     return {"status": "ok"}
 
 @app.post("/yaw_right")
-def yaw_right():
+def yaw_right(st: StateSnap = Depends(get_state)):
     logger.info("➡️ API: Yaw Right")
-    if not tracker_app: raise HTTPException(status_code=503, detail="Tracker not initialized")
-    tracker_app.move_gimbal(GIMBAL_SPEED, 0)
+    st.tracker.move_gimbal(GIMBAL_SPEED, 0)
     return {"status": "ok"}
 
 @app.post("/stop_gimbal")
-def stop_gimbal():
+def stop_gimbal(st: StateSnap = Depends(get_state)):
     logger.info("🛑 API: Stop Gimbal")
-    if not tracker_app: raise HTTPException(status_code=503, detail="Tracker not initialized")
-    tracker_app.stop_gimbal()
+    st.tracker.stop_gimbal()
     return {"status": "ok"}
 
 
@@ -303,22 +263,26 @@ def get_track_status():
         
     return {"enabled": enabled}
 
-def generate_frames():
-    """Generator for MJPEG stream."""
-    while True:
-        if tracker_app and tracker_app.latest_frame is not None:
-            # Encode frame
-            try:
-                ret, buffer = cv2.imencode('.jpg', tracker_app.latest_frame)
-                if ret:
-                    frame_bytes = buffer.tobytes()
-                    yield (b'--frame\r\n'
-                           b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
-            except Exception as e:
-                logger.error(f"Error encoding frame: {e}")
-        
-        # Limit streaming FPS to save bandwidth/cpu if needed
-        time.sleep(0.03) # ~30fps
+_MJPEG_HEADER = b'--frame\r\nContent-Type: image/jpeg\r\n\r\n'
+_MJPEG_TRAILER = b'\r\n'
+
+async def generate_frames():
+    """
+    Async generator for MJPEG stream.
+    Frames are JPEG-encoded once by the tracker loop and pushed to this viewer's queue,
+    so waiting never blocks a worker thread.
+    """
+    while tracker_app is None:
+        await asyncio.sleep(0.03)
+
+    jpeg_q = tracker_app.subscribe_jpeg()
+    try:
+        while True:
+            frame_bytes = await jpeg_q.get()
+            # One copy of the payload, one send per frame
+            yield b''.join((_MJPEG_HEADER, frame_bytes, _MJPEG_TRAILER))
+    finally:
+        tracker_app.unsubscribe_jpeg(jpeg_q)
 
 @app.get("/video_feed")
 def video_feed():
@@ -1,20 +1,40 @@
+import asyncio
 import cv2
 import time
+import numpy as np
 import threading
 from src.core.config import cfg
 from src.hardware.camera import Camera
 from src.hardware.gimbal import GimbalController
 from src.detection.detector import HailoDetector
 from src.detection.tracker import ObjectTracker
-from src.utils.visualization import draw_detections, draw_tracking_info, draw_hud
+from src.utils.visualization import (
+    detection_primitives, tracking_primitives, hud_primitives, draw_all
+)
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# libjpeg-turbo's SIMD encoder when PyTurboJPEG (and its shared lib) is installed
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR
+    _turbo_jpeg = TurboJPEG()
+except (ImportError, OSError, RuntimeError):
+    _turbo_jpeg = None
+
+JPEG_QUALITY = 80
+
+def _offer_latest(jpeg_q, jpeg):
+    # Runs on the viewer's event loop: replace an unconsumed frame rather than queue up
+    if jpeg_q.full():
+        jpeg_q.get_nowait()
+    jpeg_q.put_nowait(jpeg)
+
 class TrackingApp:
     def __init__(self, mode="debug"):
         self.mode = mode
         self.headless = cfg.get("system.headless", False)
+        self.show_hud = cfg.get("system.show_hud", True)
         
         # Initialize components
         self.camera = Camera()
@@ -22,7 +42,9 @@ class TrackingApp:
         self.detector = HailoDetector()
         self.tracker = ObjectTracker(detector=self.detector)
         
-        self.latest_detections = []
+        # (labels, confs, boxes) struct-of-arrays; boxes is an (N, 4) int32 x,y,w,h array
+        self.latest_detections = (np.empty(0, dtype=object), np.empty(0, dtype=np.float32),
+                                  np.empty((0, 4), dtype=np.int32))
         
         self.running = False
         self.fps = 0
@@ -30,10 +52,26 @@ class TrackingApp:
         self.frame_count = 0
         self.start_time = time.time()
         self.latest_frame = None
+        self._frame_id = 0
+
+        # MJPEG output: encoded once per frame in loop() and fanned out to
+        # each viewer's asyncio queue as (event_loop, queue) pairs
+        self.latest_jpeg = None
+        self._jpeg_subscribers = []
+        self._jpeg_lock = threading.Lock()
         
         # Output Streamer
         self.stream_type = cfg.get("stream.type", "web")
         self.rtsp_url = cfg.get("stream.rtsp_url", "rtsp://127.0.0.1:8554/stream")
+        # Configured output dimensions, read once instead of per frame/request
+        self.stream_width = cfg.get("camera.width", 1280)
+        self.stream_height = cfg.get("camera.height", 720)
+        self.stream_fps = cfg.get("camera.fps", 30)
+        # (height, width) of the most recent camera frame, republished every loop
+        # iteration so API handlers never touch the shared frame array
+        self.frame_hw = (self.stream_height, self.stream_width)
+        # Reused destination for the stream writer resize fallback
+        self._out_frame_buf = None
         print(self.rtsp_url)
         self.stream_writer = None
         
@@ -77,9 +115,9 @@ class TrackingApp:
             # GStreamer pipeline for RTSP push
             # Requires an RTSP server listening (e.g., mediamtx)
 
-            w = cfg.get("camera.width", 1280)
-            h = cfg.get("camera.height", 720)
-            fps = cfg.get("camera.fps", 30)
+            w = self.stream_width
+            h = self.stream_height
+            fps = self.stream_fps
 
             gst_out = (
                 f"appsrc ! videoconvert ! x264enc tune=zerolatency bitrate=2000 speed-preset=ultrafast ! "
@@ -96,16 +134,21 @@ class TrackingApp:
     def loop(self):
         try:
             while self.running:
-                loop_start = time.time()
-                
-                # 1. Get Frame
-                ret, frame = self.camera.read()
+                # 1. Get Frame (blocks until the capture thread delivers a new one)
+                ret, frame, frame_id = self.camera.wait_for_frame(self._frame_id)
+                if frame_id == self._frame_id:
+                    continue
+                self._frame_id = frame_id
                 if not ret or frame is None:
-                    time.sleep(0.01)
+                    # Failed capture; the camera thread backs off itself, so just
+                    # wait for its next attempt rather than sleeping past it
                     continue
 
                 frame_h, frame_w = frame.shape[:2]
+                self.frame_hw = (frame_h, frame_w)
                 center_x, center_y = frame_w // 2, frame_h // 2
+                # Overlay is collected here and drawn in one pass after the HUD
+                primitives = []
 
                 # Check for external tracking command
                 if hasattr(self, 'pending_tracker_init') and self.pending_tracker_init:
@@ -117,7 +160,7 @@ class TrackingApp:
                 if self.tracker.tracking_active:
                     success, bbox = self.tracker.update(frame)
                     if success:
-                        x, y, w, h = [int(v) for v in bbox]
+                        x, y, w, h = int(bbox[0]), int(bbox[1]), int(bbox[2]), int(bbox[3])
                         target_x = x + w // 2
                         target_y = y + h // 2
                         
@@ -128,7 +171,7 @@ class TrackingApp:
                         self.gimbal.update_tracking(error_x, error_y)
                         
                         # Visualize (Always draw for streaming)
-                        draw_tracking_info(frame, bbox, center_x, center_y, error_x, error_y)
+                        primitives += tracking_primitives(bbox, center_x, center_y, error_x, error_y)
                     else:
                         logger.info("Tracking lost.")
                         self.tracker.tracking_active = False
@@ -136,55 +179,107 @@ class TrackingApp:
                 
                 # 3. Detection Logic (if not tracking)
                 elif self.detector.enabled:
-                    detections = self.detector.detect(frame)
-                    self.latest_detections = detections # Store for mouse selection
+                    # Pipelined: boxes are from the previous frame while this one is on the NPU
+                    labels, confs, boxes = self.detector.detect_arrays_pipelined(frame)
+                    # Store for mouse selection; one tuple swap so readers never see mixed columns
+                    self.latest_detections = (labels, confs, boxes)
                     # Always draw detections for streaming
-                    draw_detections(frame, detections)
+                    primitives += detection_primitives(labels, confs, boxes)
                         
                 # 4. Display & Input
                 self._calculate_fps()
-                # Always draw HUD for streaming
-                draw_hud(frame, self.mode, self.fps)
+                # HUD goes to the stream and the local window unless disabled
+                if self.show_hud:
+                    primitives += hud_primitives(frame, self.mode, self.fps)
+                draw_all(frame, primitives)
                 
-                # Store processed frame for streaming
-                self.latest_frame = frame.copy()
+                # Publish processed frame for streaming. Camera.read() hands out a
+                # fresh array every iteration and nothing below draws on it, so a
+                # reference swap is enough (no per-frame copy).
+                self.latest_frame = frame
+
+                # Encode once for all MJPEG viewers (skipped when nobody is watching)
+                if self.jpeg_viewers > 0:
+                    self._publish_jpeg(frame)
                 
                 # Write to RTSP if enabled
                 if self.stream_writer is not None:
                      # Resize to configured stream dimensions to avoid GStreamer errors
-                     w = cfg.get("camera.width", 1280)
-                     h = cfg.get("camera.height", 720)
+                     w = self.stream_width
+                     h = self.stream_height
 
                      if frame.shape[1] != w or frame.shape[0] != h:
-                         out_frame = cv2.resize(frame, (w, h))
+                         # Only hit when the camera can't deliver the configured size
+                         if self._out_frame_buf is None or self._out_frame_buf.shape[2:] != frame.shape[2:]:
+                             self._out_frame_buf = np.empty((h, w) + frame.shape[2:], dtype=frame.dtype)
+                         out_frame = cv2.resize(frame, (w, h), dst=self._out_frame_buf,
+                                                interpolation=cv2.INTER_AREA)
                      else:
                          out_frame = frame
 
                      self.stream_writer.write(out_frame)
                 
                 if not self.headless:
-                    # Draw ROI selection if dragging
+                    # Draw ROI selection if dragging (on a copy, latest_frame is shared)
+                    display_frame = frame
                     if self.is_dragging and self.drag_start_point and self.current_mouse_point:
-                        cv2.rectangle(frame, self.drag_start_point, self.current_mouse_point, (255, 255, 0), 2)
+                        display_frame = frame.copy()
+                        cv2.rectangle(display_frame, self.drag_start_point, self.current_mouse_point, (255, 255, 0), 2)
                         
-                    cv2.imshow("Tracker", frame)
+                    cv2.imshow("Tracker", display_frame)
                     
                     key = cv2.waitKey(1) & 0xFF
                     self._handle_input(key, frame)
                     
                     if key == ord('q'):
                         self.running = False
-                else:
-                    # In headless, minimal sleep to prevent CPU hogging if capture is non-blocking (though read() is usually blocking/rate-limited)
-                    # But we also need to allow API/Signals to process.
-                    # Since Camera.read() is threaded and Rate-limited by FPS, we are fine.
-                    time.sleep(0.001)
             
         except KeyboardInterrupt:
             print("Interrupted")
         finally:
             self.cleanup()
 
+    def _publish_jpeg(self, frame):
+        try:
+            if _turbo_jpeg is not None:
+                jpeg = _turbo_jpeg.encode(frame, quality=JPEG_QUALITY, pixel_format=TJPF_BGR)
+            else:
+                ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
+                if not ret:
+                    return
+                # View the encoder's buffer instead of copying it into bytes
+                jpeg = buffer.reshape(-1).data
+        except Exception as e:
+            logger.error(f"Error encoding frame: {e}")
+            return
+        self.latest_jpeg = jpeg
+        with self._jpeg_lock:
+            subscribers = list(self._jpeg_subscribers)
+        for event_loop, jpeg_q in subscribers:
+            try:
+                event_loop.call_soon_threadsafe(_offer_latest, jpeg_q, jpeg)
+            except RuntimeError:
+                # Event loop already closed; drop the stale viewer
+                self.unsubscribe_jpeg(jpeg_q)
+
+    @property
+    def jpeg_viewers(self):
+        return len(self._jpeg_subscribers)
+
+    def subscribe_jpeg(self):
+        """
+        Register a viewer from inside a running event loop.
+        Returns an asyncio.Queue(maxsize=1) that always holds the newest JPEG.
+        """
+        jpeg_q = asyncio.Queue(maxsize=1)
+        with self._jpeg_lock:
+            self._jpeg_subscribers.append((asyncio.get_running_loop(), jpeg_q))
+        return jpeg_q
+
+    def unsubscribe_jpeg(self, jpeg_q):
+        with self._jpeg_lock:
+            self._jpeg_subscribers = [sub for sub in self._jpeg_subscribers if sub[1] is not jpeg_q]
+
     def _handle_input(self, key, frame):
         if key == ord('s'): # Select ROI
             self.gimbal.stop()
@@ -251,12 +346,11 @@ class TrackingApp:
                 else: # Click behavior (Object Selection)
                     logger.info(f"Mouse click at ({x}, {y})")
                     # Check if click is inside any detection box
-                    for label, conf, bbox in self.latest_detections:
-                         dx, dy, dw, dh = [int(v) for v in bbox]
-                         if dx <= x <= dx + dw and dy <= y <= dy + dh:
-                             logger.info(f"Selected object: {label} ({conf:.2f})")
-                             self.pending_tracker_init = (dx, dy, dw, dh)
-                             break
+                    hit = self.find_detection_at(x, y)
+                    if hit is not None:
+                        label, conf, bbox = hit
+                        logger.info(f"Selected object: {label} ({conf:.2f})")
+                        self.pending_tracker_init = bbox
                              
             self.drag_start_point = None
 
@@ -266,6 +360,22 @@ class TrackingApp:
              self.gimbal.center()
              logger.info("Tracking canceled via mouse.")
 
+    def find_detection_at(self, x, y):
+        """
+        Returns (label, conf, (x, y, w, h)) of the first detection containing the point, or None.
+        """
+        labels, confs, boxes = self.latest_detections
+        if len(boxes) == 0:
+            return None
+        hits = np.flatnonzero(
+            (boxes[:, 0] <= x) & (x <= boxes[:, 0] + boxes[:, 2]) &
+            (boxes[:, 1] <= y) & (y <= boxes[:, 1] + boxes[:, 3])
+        )
+        if hits.size == 0:
+            return None
+        idx = hits[0]
+        return labels[idx], float(confs[idx]), tuple(int(v) for v in boxes[idx])
+
     # API Methods for Production Mode
     def set_tracking_target(self, bbox):
         """
@@ -299,13 +409,8 @@ class TrackingApp:
         Moves the gimbal to center the given normalized point.
         Initializes a visual tracker at the point to ensure it stays centered.
         """
-        current_frame = self.latest_frame
-        if current_frame is None:
-            # Fallback to config dims
-            h = cfg.get("camera.height", 720)
-            w = cfg.get("camera.width", 1280)
-        else:
-            h, w = current_frame.shape[:2]
+        # Falls back to config dims until the first frame arrives
+        h, w = self.frame_hw
             
         # Target pixel coordinates
         target_x = int(x_norm * w)
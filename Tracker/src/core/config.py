@@ -1,10 +1,79 @@
 import yaml
 import os
+import pickle
+import stat
+import tempfile
 from typing import Dict, Any
 
+# libyaml's C loader when PyYAML was built against it
+try:
+    from yaml import CSafeLoader as _Loader
+except ImportError:
+    from yaml import SafeLoader as _Loader
+
+# Parsed config cached across process starts, keyed on the yaml file's identity.
+# Kept in a per-user directory: the cache is unpickled, so nobody else may write it.
+_CACHE_DIR = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'), 'tracker')
+_CACHE_PATH = os.path.join(_CACHE_DIR, 'cfg.pkl')
+_O_NOFOLLOW = getattr(os, 'O_NOFOLLOW', 0)
+
+def _owned_private(st: os.stat_result) -> bool:
+    # Ours and not group/world writable (no uid concept on Windows)
+    return not hasattr(os, 'getuid') or (st.st_uid == os.getuid() and not st.st_mode & 0o022)
+
+def _cache_key(config_path: str) -> tuple:
+    st = os.stat(config_path)
+    return (config_path, st.st_mtime_ns, st.st_size)
+
+def _read_cache(key: tuple) -> Any:
+    try:
+        # Check the descriptor we actually read, not the path, so the file
+        # can't be swapped between the check and the load
+        fd = os.open(_CACHE_PATH, os.O_RDONLY | _O_NOFOLLOW)
+        with os.fdopen(fd, 'rb') as f:
+            st = os.fstat(f.fileno())
+            if not stat.S_ISREG(st.st_mode) or not _owned_private(st):
+                return None
+            cached = pickle.load(f)
+    except Exception:
+        return None
+    if not isinstance(cached, dict) or cached.get('key') != key:
+        return None
+    return cached.get('cfg')
+
+def _write_cache(key: tuple, config: Any) -> None:
+    tmp_path = None
+    try:
+        os.makedirs(_CACHE_DIR, mode=0o700, exist_ok=True)
+        st = os.lstat(_CACHE_DIR)
+        if not stat.S_ISDIR(st.st_mode) or not _owned_private(st):
+            return
+        # mkstemp: unique name, O_EXCL, mode 0600
+        fd, tmp_path = tempfile.mkstemp(dir=_CACHE_DIR, prefix='cfg.', suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump({'key': key, 'cfg': config}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, _CACHE_PATH)
+    except Exception:
+        # Cache is best effort; the yaml is the source of truth
+        if tmp_path is not None:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+def _flatten(node: Any, prefix: str, out: Dict[str, Any]) -> Dict[str, Any]:
+    # Every node is reachable by its dotted path, including intermediate dicts
+    if isinstance(node, dict):
+        for key, value in node.items():
+            path = f"{prefix}.{key}" if prefix else str(key)
+            out[path] = value
+            _flatten(value, path, out)
+    return out
+
 class Config:
     _instance = None
     _config: Dict[str, Any] = {}
+    _flat: Dict[str, Any] = {}
 
     def __new__(cls):
         if cls._instance is None:
@@ -17,21 +86,31 @@ class Config:
         if not os.path.exists(config_path):
             raise FileNotFoundError(f"Config file not found at {config_path}")
             
-        with open(config_path, 'r') as f:
-            self._config = yaml.safe_load(f)
+        key = _cache_key(config_path)
+        config = _read_cache(key)
+        if config is None:
+            with open(config_path, 'r') as f:
+                config = yaml.load(f, Loader=_Loader)
+            _write_cache(key, config)
+        self._config = config
+        self._flat = _flatten(self._config, "", {})
 
     def get(self, path: str, default: Any = None) -> Any:
         """
         Get config value using dot notation, e.g. "camera.url"
         """
+        return self._flat.get(path, default)
+
+    def set(self, path: str, value: Any) -> None:
+        """
+        Set config value using dot notation, e.g. "system.headless"
+        """
         keys = path.split('.')
-        value = self._config
-        try:
-            for key in keys:
-                value = value[key]
-            return value
-        except (KeyError, TypeError):
-            return default
+        node = self._config
+        for key in keys[:-1]:
+            node = node.setdefault(key, {})
+        node[keys[-1]] = value
+        self._flat = _flatten(self._config, "", {})
 
     @property
     def data(self) -> Dict[str, Any]:
@@ -17,6 +17,8 @@ class STrack(BaseTrack):
 
         self.score = score
         self.tracklet_len = 0
+        # Row of the update() input this track was last matched to (-1: none)
+        self.det_idx = -1
 
     def predict(self):
         mean_state = self.mean.copy()
@@ -62,6 +64,7 @@ class STrack(BaseTrack):
         if new_id:
             self.track_id = self.next_id()
         self.score = new_track.score
+        self.det_idx = new_track.det_idx
 
     def update(self, new_track, frame_id):
         """
@@ -81,6 +84,7 @@ class STrack(BaseTrack):
         self.is_activated = True
 
         self.score = new_track.score
+        self.det_idx = new_track.det_idx
 
     @property
     # @jit(nopython=True)
@@ -179,6 +183,8 @@ class BYTETracker(object):
             '''Detections'''
             detections = [STrack(STrack.tlbr_to_tlwh(tlbr), s) for
                           (tlbr, s) in zip(dets, scores_keep)]
+            for det, i in zip(detections, np.flatnonzero(remain_inds).tolist()):
+                det.det_idx = i
         else:
             detections = []
 
@@ -216,6 +222,8 @@ class BYTETracker(object):
             '''Detections'''
             detections_second = [STrack(STrack.tlbr_to_tlwh(tlbr), s) for
                           (tlbr, s) in zip(dets_second, scores_second)]
+            for det, i in zip(detections_second, np.flatnonzero(inds_second).tolist()):
+                det.det_idx = i
         else:
             detections_second = []
         r_tracked_stracks = [strack_pool[i] for i in u_track if strack_pool[i].state == TrackState.Tracked]
@@ -279,6 +287,19 @@ class BYTETracker(object):
 
         return output_stracks
 
+    def update_arrays(self, output_results):
+        """
+        update() returning the active tracks as parallel arrays, in update() order:
+        (ids: int32 (M,), tlwhs: float32 (M, 4))
+        """
+        output_stracks = self.update(output_results)
+        n = len(output_stracks)
+        ids = np.fromiter((t.track_id for t in output_stracks), dtype=np.int32, count=n)
+        tlwhs = np.empty((n, 4), dtype=np.float32)
+        for i, t in enumerate(output_stracks):
+            tlwhs[i] = t.tlwh
+        return ids, tlwhs
+
 
 def joint_stracks(tlista, tlistb):
     exists = {}
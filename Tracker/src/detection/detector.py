@@ -1,8 +1,8 @@
 import cv2
 import numpy as np
 import time
-import queue
-from functools import partial
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from src.core.config import cfg
 from src.utils.logger import get_logger
 from .hailo_inference import HailoInfer
@@ -10,6 +10,43 @@ from .postprocess import extract_detections
 
 logger = get_logger(__name__)
 
+def _empty_detections():
+    return (np.empty(0, dtype=object), np.empty(0, dtype=np.float32),
+            np.empty((0, 4), dtype=np.int32))
+
+def _select_raw_to_list(raw_results):
+    """
+    Converter from the callback's raw output to extract_detections input, or None.
+    """
+    if isinstance(raw_results, list):
+        return lambda r: r
+    if isinstance(raw_results, dict):
+        return lambda r: list(r.values())
+    if isinstance(raw_results, np.ndarray):
+        return lambda r: [r[0]] if r.ndim == 3 and r.shape[0] == 1 else [r]
+    return None
+
+class _JobResult:
+    """
+    One-shot result slot for a submitted frame: an Event plus the value/error.
+    Lighter than a concurrent.futures.Future, and one per job so pipelined
+    submissions never share a slot.
+    """
+    __slots__ = ('ready', 'value', 'error')
+
+    def __init__(self):
+        self.ready = threading.Event()
+        self.value = None
+        self.error = None
+
+    def set(self, value):
+        self.value = value
+        self.ready.set()
+
+    def fail(self, error):
+        self.error = error
+        self.ready.set()
+
 class HailoDetector:
     def __init__(self):
         self.model_path = cfg.get("detection.model_path")
@@ -17,10 +54,33 @@ class HailoDetector:
         self.enabled = cfg.get("detection.enabled", True)
         self.labels_path = cfg.get("detection.labels_path")
         self.labels = self.load_labels(self.labels_path)
+        self._label_array = np.array(self.labels, dtype=object)
         
         self.hailo_infer = None
         self.input_shape = None
-        self.queue = queue.Queue(maxsize=1)
+        # Single worker so submissions reach the device in order
+        self._exec = ThreadPoolExecutor(max_workers=1, thread_name_prefix="hailo")
+        # Raw output -> extract_detections input, chosen on the first result
+        self._raw_to_list = None
+        # Bound once; HailoInfer.run attaches each job's bindings and result slot
+        self._cb = self._callback
+        # (frame, job) submitted by detect_arrays_pipelined() and not yet collected
+        self._pending = None
+        # Two letterbox canvases alternated by preprocess(), plus the (w, h) of each ROI.
+        # Safe because _submit() guarantees every job older than the previous
+        # submission has finished (see _stale), so job n's canvas (n - 2's) is free.
+        self._canvases = [None, None]
+        self._last_rois = [None, None]
+        self._canvas_idx = 0
+        # Jobs _collect() gave up on that may still be running on the device (and so
+        # still own a canvas and an output set); _submit() refuses new work until
+        # they finish
+        self._stale = []
+        # Last frame seen by detect_arrays() and its result. Matched by identity:
+        # Camera.read() hands out a fresh array per frame, so a second call on the
+        # same object (tracker init + update in one loop pass) reuses the result.
+        self._last_frame = None
+        self._last_result = None
         
         self.config_data = {
              "labels": self.labels,
@@ -34,7 +94,10 @@ class HailoDetector:
 
         try:
             logger.info(f"Initializing Hailo Detector with model: {self.model_path}")
-            self.hailo_infer = HailoInfer(self.model_path)
+            # When job n is submitted, jobs before n - 1 have all finished (timed-out
+            # ones included, see _submit) and n - 1 is in flight or being
+            # postprocessed, so a ring of three output sets is never reused early
+            self.hailo_infer = HailoInfer(self.model_path, output_pool_size=3)
             self.input_shape = self.hailo_infer.get_input_shape()
             logger.info(f"Hailo Initialized. Input shape: {self.input_shape}")
         except Exception as e:
@@ -53,119 +116,203 @@ class HailoDetector:
     def preprocess(self, image):
         """
         Resize image with unchanged aspect ratio using padding.
+        Writes into one of two canvases reused across calls; the result stays valid
+        until the call after next.
         """
         model_h, model_w, _ = self.input_shape
         img_h, img_w, _ = image.shape[:3]
         scale = min(model_w / img_w, model_h / img_h)
         new_img_w, new_img_h = int(img_w * scale), int(img_h * scale)
-        image_resized = cv2.resize(image, (new_img_w, new_img_h), interpolation=cv2.INTER_CUBIC)
+        x0 = (model_w - new_img_w) // 2
+        y0 = (model_h - new_img_h) // 2
 
-        padded_image = np.full((model_h, model_w, 3), (114, 114, 114), dtype=np.uint8)
-        x_offset = (model_w - new_img_w) // 2
-        y_offset = (model_h - new_img_h) // 2
-        padded_image[y_offset : y_offset + new_img_h, x_offset : x_offset + new_img_w] = image_resized
+        idx = self._canvas_idx
+        self._canvas_idx = idx ^ 1
+        canvas = self._canvases[idx]
+        if canvas is None:
+            canvas = self._canvases[idx] = np.full((model_h, model_w, 3), 114, dtype=np.uint8)
+        elif self._last_rois[idx] != (new_img_w, new_img_h):
+            # ROI moved: repaint the four border strips only
+            canvas[:y0] = 114
+            canvas[y0 + new_img_h:] = 114
+            canvas[y0:y0 + new_img_h, :x0] = 114
+            canvas[y0:y0 + new_img_h, x0 + new_img_w:] = 114
+        self._last_rois[idx] = (new_img_w, new_img_h)
 
-        return padded_image
+        roi = canvas[y0:y0 + new_img_h, x0:x0 + new_img_w]
+        resized = cv2.resize(image, (new_img_w, new_img_h), dst=roi, interpolation=cv2.INTER_LINEAR)
+        if not np.may_share_memory(resized, canvas):
+            # OpenCV reallocated instead of writing through the view
+            roi[...] = resized
+        return canvas
 
-    def _callback(self, completion_info, bindings_list, output_queue):
+    def _callback(self, completion_info, bindings_list, job):
         """
-        Callback from HailoInfer.
+        Callback from HailoInfer; fills the result slot of the submitted frame.
         """
         if completion_info.exception:
             print(f"[ERROR] Inference error: {completion_info.exception}")
-            output_queue.put(None)
+            job.set(None)
         else:
             # We assume batch size 1
-            for i, bindings in enumerate(bindings_list):
-                 if len(bindings._output_names) == 1:
-                     result = bindings.output().get_buffer()
-                 else:
-                     result = {
-                         name: np.expand_dims(bindings.output(name).get_buffer(), axis=0)
-                         for name in bindings._output_names
-                     }
-                 output_queue.put(result)
+            bindings = bindings_list[0]
+            if len(bindings._output_names) == 1:
+                result = bindings.output().get_buffer()
+            else:
+                result = {
+                    name: bindings.output(name).get_buffer()[None, ...]
+                    for name in bindings._output_names
+                }
+            job.set(result)
 
     def detect(self, frame):
         """
         Synchonous detection wrapper.
+        Returns [(label, conf, (x,y,w,h))]; prefer detect_arrays() in hot loops.
+        """
+        labels, confs, boxes = self.detect_arrays(frame)
+        return [(label, conf, (x, y, w, h))
+                for label, conf, (x, y, w, h) in zip(labels, confs.tolist(), boxes.tolist())]
+
+    def detect_arrays(self, frame):
+        """
+        Synchonous detection returning struct-of-arrays:
+        (labels: object array (N,), confs: float32 (N,), boxes: int32 (N, 4) as x,y,w,h)
         """
         if not self.enabled or self.hailo_infer is None:
-            return []
+            return _empty_detections()
 
+        if frame is self._last_frame:
+            return self._last_result
+
+        # Results must belong to this frame, so drop anything still in flight
+        self.flush()
         try:
-            # 1. Preprocess
-            processed = self.preprocess(frame)
-            
-            # 2. Run Inference
-            # Define callback specifically for this run
-            cb = partial(self._callback, output_queue=self.queue)
-            
             try:
-                self.hailo_infer.run([processed], cb)
+                job = self._submit(frame)
             except Exception as e:
                  logger.error(f"Hailo Run Failed: {e}")
-                 return []
-            
-            # 3. Wait for result
-            try:
-                raw_results = self.queue.get(timeout=1.0) # 1 sec timeout
-            except queue.Empty:
-                logger.warning("Inference timed out.")
-                return []
-            
-            if raw_results is None:
-                return []
+                 return _empty_detections()
+            result = self._collect(frame, job)
+            self._last_frame, self._last_result = frame, result
+            return result
 
-            # 4. Postprocess
-            detections_input = []
-            
-            if isinstance(raw_results, list):
-                detections_input = raw_results
-            elif isinstance(raw_results, dict):
-                detections_input = list(raw_results.values())
-            elif isinstance(raw_results, np.ndarray):
-                if len(raw_results.shape) == 3 and raw_results.shape[0] == 1:
-                     detections_input = [raw_results[0]]
-                else:
-                     detections_input = [raw_results]
-            else:
-                logger.warning(f"Unknown raw_results type: {type(raw_results)}")
-                return []
+        except Exception as e:
+            print(f"[ERROR] Detection Loop Error: {e}")
+            return _empty_detections()
 
-            # Try to catch the specific postprocess error
+    def detect_arrays_pipelined(self, frame):
+        """
+        Submit frame and return the detections of the previously submitted one, so the
+        NPU runs while the caller draws/streams. Same format as detect_arrays();
+        empty on the first call.
+        """
+        if not self.enabled or self.hailo_infer is None:
+            return _empty_detections()
+
+        pending, self._pending = self._pending, None
+        try:
             try:
-                results = extract_detections(frame, detections_input, self.config_data)
+                self._pending = (frame, self._submit(frame))
             except Exception as e:
-                logger.error(f"extract_detections failed: {e}")
-                return []
-
-            # Convert to our format: [(label, conf, (x,y,w,h))]
-            detections = []
-            boxes = results.get("detection_boxes", [])
-            scores = results.get("detection_scores", [])
-            classes = results.get("detection_classes", [])
-            
-            for i in range(len(boxes)):
-                box = boxes[i] # [xmin, ymin, xmax, ymax]
-                score = scores[i]
-                class_id = int(classes[i])
-                
-                label = self.labels[class_id] if class_id < len(self.labels) else f"Class {class_id}"
-                
-                x = int(box[0])
-                y = int(box[1])
-                w = int(box[2] - box[0])
-                h = int(box[3] - box[1])
-                
-                detections.append((label, score, (x, y, w, h)))
-                
-            return detections
-            
+                 logger.error(f"Hailo Run Failed: {e}")
+            if pending is None:
+                return _empty_detections()
+            return self._collect(*pending)
+
+        except Exception as e:
+            print(f"[ERROR] Detection Loop Error: {e}")
+            return _empty_detections()
+
+    def flush(self):
+        """
+        Wait for the in-flight pipelined frame, if any, and return its detections.
+        """
+        pending, self._pending = self._pending, None
+        if pending is None:
+            return _empty_detections()
+        try:
+            return self._collect(*pending)
         except Exception as e:
             print(f"[ERROR] Detection Loop Error: {e}")
-            return []
+            return _empty_detections()
+
+    def _submit(self, frame):
+        if self._stale:
+            self._stale = [job for job in self._stale if not job.ready.is_set()]
+            if self._stale:
+                # The stalled job may still be reading the canvas or writing the
+                # output set this submission would take; skip the frame instead
+                raise RuntimeError("previous inference still running, frame skipped")
+
+        # 1. Preprocess
+        processed = self.preprocess(frame)
+
+        # 2. Run Inference on the device thread; the callback fills this frame's slot
+        job = _JobResult()
+        self._exec.submit(self._run_job, processed, job)
+        return job
+
+    def _run_job(self, processed, job):
+        # Binding setup and wait_for_async_ready block here, not on the caller
+        try:
+            self.hailo_infer.run([processed], self._cb, job=job)
+        except Exception as e:
+            job.fail(e)
+
+    def _collect(self, frame, job):
+        # 3. Wait for result
+        if not job.ready.wait(timeout=1.0): # 1 sec timeout
+            logger.warning("Inference timed out.")
+            self._stale.append(job)
+            return _empty_detections()
+        if job.error is not None:
+            logger.error(f"Hailo Run Failed: {job.error}")
+            return _empty_detections()
+
+        raw_results = job.value
+        if raw_results is None:
+            return _empty_detections()
+
+        # 4. Postprocess
+        # The output type is fixed by the model, so pick the converter once
+        if self._raw_to_list is None:
+            self._raw_to_list = _select_raw_to_list(raw_results)
+            if self._raw_to_list is None:
+                logger.warning(f"Unknown raw_results type: {type(raw_results)}")
+                return _empty_detections()
+        detections_input = self._raw_to_list(raw_results)
+
+        # Try to catch the specific postprocess error
+        try:
+            results = extract_detections(frame, detections_input, self.config_data)
+        except Exception as e:
+            logger.error(f"extract_detections failed: {e}")
+            return _empty_detections()
+
+        # Convert columns at once: [xmin, ymin, xmax, ymax] -> x, y, w, h
+        corners = np.asarray(results.get("detection_boxes", []), dtype=np.float64).reshape(-1, 4)
+        if len(corners) == 0:
+            return _empty_detections()
+        confs = np.asarray(results.get("detection_scores", []), dtype=np.float32)
+        class_ids = np.asarray(results.get("detection_classes", []), dtype=np.int64)
+
+        boxes = np.empty((len(corners), 4), dtype=np.int32)
+        boxes[:, :2] = corners[:, :2]
+        boxes[:, 2:] = corners[:, 2:] - corners[:, :2]
+
+        if class_ids.size and class_ids.max() < len(self._label_array):
+            labels = self._label_array[class_ids]
+        else:
+            labels = np.array(
+                [self.labels[c] if c < len(self.labels) else f"Class {c}" for c in class_ids.tolist()],
+                dtype=object,
+            )
+
+        return labels, confs, boxes
 
     def close(self):
+        self.flush()
+        self._exec.shutdown(wait=True)
         if self.hailo_infer:
             self.hailo_infer.close()
@@ -20,6 +20,7 @@ class HailoInfer:
         input_type: Optional[str] = None,
         output_type: Optional[str] = None,
         priority: Optional[int] = 0,
+        output_pool_size: int = 0,
     ) -> None:
         """
         Initialize the HailoAsyncInference class.
@@ -30,6 +31,10 @@ class HailoInfer:
             input_type: Input data type format ('UINT8', 'UINT16', 'FLOAT32').
             output_type: Output data type format.
             priority: Scheduler priority value.
+            output_pool_size: Output buffer sets recycled round-robin across frames.
+                Only safe when fewer results than this are alive at once (in flight,
+                still being read, or abandoned by a caller's timeout but still running
+                on the device); 0 allocates fresh buffers per frame.
         """
         params = VDevice.create_params()
         params.scheduling_algorithm = HailoSchedulingAlgorithm.ROUND_ROBIN
@@ -49,6 +54,9 @@ class HailoInfer:
         self.configured_model.set_scheduler_priority(priority)
         self.last_infer_job = None
 
+        self._output_pool = [self._alloc_output_buffers() for _ in range(output_pool_size)]
+        self._pool_idx = 0
+
     def _set_input_type(self, input_type: Optional[str] = None) -> None:
         """Set the input type for the HEF model."""
         if input_type is not None:
@@ -75,33 +83,58 @@ class HailoInfer:
         """Get the shape of the model's input layer."""
         return self.hef.get_input_vstream_infos()[0].shape
 
-    def run(self, input_batch: List[np.ndarray], inference_callback_fn) -> object:
-        """Run an asynchronous inference job on a batch of preprocessed inputs."""
+    def run(self, input_batch: List[np.ndarray], inference_callback_fn, **callback_kwargs) -> object:
+        """
+        Run an asynchronous inference job on a batch of preprocessed inputs.
+
+        callback_kwargs carry per-job state to the callback alongside bindings_list,
+        so callers can build their callback once instead of a partial per job.
+        """
         bindings_list = self.create_bindings(self.configured_model, input_batch)
         self.configured_model.wait_for_async_ready(timeout_ms=10000)
 
         self.last_infer_job = self.configured_model.run_async(
-            bindings_list, partial(inference_callback_fn, bindings_list=bindings_list)
+            bindings_list,
+            partial(inference_callback_fn, bindings_list=bindings_list, **callback_kwargs),
         )
 
     def create_bindings(self, configured_model, input_batch):
-        """Create a list of input-output bindings for a batch of frames."""
+        """
+        Create a list of input-output bindings for a batch of frames.
+        input_batch may be a list of frames or one (B, H, W, C) array; rows of a
+        contiguous batch array are bound without copying.
+        """
 
         def frame_binding(frame: np.ndarray):
-            output_buffers = {
-                name: np.empty(
-                    self.infer_model.output(name).shape,
-                    dtype=(getattr(np, self.output_type[name].lower())),
-                )
-                for name in self.output_type
-            }
+            if self._output_pool:
+                output_buffers = self._output_pool[self._pool_idx]
+                self._pool_idx = (self._pool_idx + 1) % len(self._output_pool)
+            else:
+                output_buffers = self._alloc_output_buffers()
 
             binding = configured_model.create_bindings(output_buffers=output_buffers)
-            binding.input().set_buffer(np.array(frame))
+            # Preprocessed frames are already contiguous uint8; only copy when they aren't
+            if frame.flags.c_contiguous and frame.dtype == np.uint8:
+                buf = frame
+            else:
+                buf = np.ascontiguousarray(frame, dtype=np.uint8)
+            binding.input().set_buffer(buf)
+            # The device reads buf asynchronously; keep it alive as long as the binding
+            binding._input_ref = buf
             return binding
 
         return [frame_binding(frame) for frame in input_batch]
 
+    def _alloc_output_buffers(self) -> Dict[str, np.ndarray]:
+        """Allocate one output buffer per model output."""
+        return {
+            name: np.empty(
+                self.infer_model.output(name).shape,
+                dtype=(getattr(np, self.output_type[name].lower())),
+            )
+            for name in self.output_type
+        }
+
     def _output_data_type2dict(self, data_type: Optional[str]) -> Dict[str, str]:
         """Generate a dictionary mapping each output layer name to its data type."""
         valid_types = {"float32", "uint8", "uint16"}
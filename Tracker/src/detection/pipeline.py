@@ -3,13 +3,14 @@ Detection Pipeline
 Main orchestrator for object detection pipeline
 """
 
+import os
 import time
 import queue
 import threading
 import cv2
 import numpy as np
 from typing import List, Optional
-from functools import partial
+from functools import lru_cache, partial
 
 from ..camera import CameraFactory, VideoInput, ImageInput
 from .hailo_inference import HailoInfer
@@ -18,11 +19,40 @@ from .visualize import visualize, draw_detections
 from ..config import DEFAULT_CONFIG
 from ..tracker import ManualObjectTracker
 from ..utils.logger import get_logger
+from ..utils.spsc import SPSCRing
 
 logger = get_logger(__name__)
 
+# Detections for frames where inference was skipped; never mutated downstream
+_EMPTY_DETECTIONS = {
+    "detection_boxes": np.empty((0, 4), dtype=np.float32),
+    "detection_scores": np.empty((0,), dtype=np.float32),
+    "detection_classes": np.empty((0,), dtype=np.int32),
+    "num_detections": 0,
+}
 
-def default_preprocess(image: np.ndarray, model_w: int, model_h: int) -> np.ndarray:
+
+@lru_cache(maxsize=8)
+def _letterbox_matrix(img_h: int, img_w: int, model_h: int, model_w: int) -> np.ndarray:
+    """
+    Scale+translate matrix that letterboxes an img_w x img_h frame into the model input.
+    Cached per shape since a stream's frame size doesn't change; do not modify the result.
+    """
+    scale = min(model_w / img_w, model_h / img_h)
+    new_img_w, new_img_h = int(img_w * scale), int(img_h * scale)
+    x_offset = (model_w - new_img_w) // 2
+    y_offset = (model_h - new_img_h) // 2
+
+    # The half-pixel terms match cv2.resize's pixel-center sampling
+    shift = 0.5 * scale - 0.5
+    return np.array(
+        [[scale, 0, x_offset + shift], [0, scale, y_offset + shift]], dtype=np.float32
+    )
+
+
+def default_preprocess(
+    image: np.ndarray, model_w: int, model_h: int, dst: Optional[np.ndarray] = None
+) -> np.ndarray:
     """
     Resize image with unchanged aspect ratio using padding.
 
@@ -30,23 +60,27 @@ def default_preprocess(image: np.ndarray, model_w: int, model_h: int) -> np.ndar
         image: Input image (RGB format).
         model_w: Model input width.
         model_h: Model input height.
+        dst: Optional (model_h, model_w, 3) uint8 buffer to write into.
 
     Returns:
-        Preprocessed and padded image.
+        Preprocessed and padded image (dst when given).
     """
     img_h, img_w, _ = image.shape[:3]
-    scale = min(model_w / img_w, model_h / img_h)
-    new_img_w, new_img_h = int(img_w * scale), int(img_h * scale)
-    image = cv2.resize(image, (new_img_w, new_img_h), interpolation=cv2.INTER_CUBIC)
-
-    padded_image = np.full((model_h, model_w, 3), (114, 114, 114), dtype=np.uint8)
-    x_offset = (model_w - new_img_w) // 2
-    y_offset = (model_h - new_img_h) // 2
-    padded_image[y_offset : y_offset + new_img_h, x_offset : x_offset + new_img_w] = (
-        image
+    # Resize and pad in one pass over the output
+    out = cv2.warpAffine(
+        image,
+        _letterbox_matrix(img_h, img_w, model_h, model_w),
+        (model_w, model_h),
+        dst=dst,
+        flags=cv2.INTER_LINEAR,
+        borderMode=cv2.BORDER_CONSTANT,
+        borderValue=(114, 114, 114),
     )
-
-    return padded_image
+    if dst is not None and not np.may_share_memory(out, dst):
+        # OpenCV reallocated instead of writing through the view
+        dst[...] = out
+        return dst
+    return out
 
 
 def divide_list_to_batches(images_list: List[np.ndarray], batch_size: int):
@@ -69,45 +103,41 @@ def preprocess_stream(
     Args:
         input_source: Camera or Video input source.
         batch_size: Number of frames per batch.
-        input_queue: Queue for input frames.
+        input_queue: Queue for input frames (an SPSCRing when drop_frames is set).
         width: Model input width.
         height: Model input height.
-        drop_frames: If True, drop frames when queue is full (reduces latency).
+        drop_frames: If True, drop the oldest queued batch when full (reduces latency).
     """
     frames = []
-    processed_frames = []
+    # Each batch is preprocessed straight into one contiguous (B, H, W, 3) array;
+    # a fresh one is allocated per batch because the queued batch is still in use
+    processed_frames = np.empty((batch_size, height, width, 3), dtype=np.uint8)
 
     while True:
         ret, frame = input_source.read_frame()
         if not ret:
             break
 
+        default_preprocess(frame, width, height, dst=processed_frames[len(frames)])
         frames.append(frame)
-        processed_frame = default_preprocess(frame, width, height)
-        processed_frames.append(processed_frame)
 
         if len(frames) == batch_size:
             if drop_frames:
-                # Non-blocking put - skip frame if queue is full
-                try:
-                    input_queue.put((frames, processed_frames), block=False)
-                except queue.Full:
-                    # Queue full, drop this batch to maintain real-time performance
-                    pass
+                # Never blocks: a full ring drops its oldest batch so infer sees the newest
+                input_queue.push_overwrite((frames, processed_frames))
             else:
                 # Blocking put - wait until queue has space
                 input_queue.put((frames, processed_frames))
-            processed_frames, frames = [], []
+            frames = []
+            processed_frames = np.empty((batch_size, height, width, 3), dtype=np.uint8)
 
     # Handle remaining frames
     if frames:
+        remaining = processed_frames[: len(frames)]
         if drop_frames:
-            try:
-                input_queue.put((frames, processed_frames), block=False)
-            except queue.Full:
-                pass
+            input_queue.push_overwrite((frames, remaining))
         else:
-            input_queue.put((frames, processed_frames))
+            input_queue.put((frames, remaining))
 
     input_queue.put(None)  # Sentinel value
 
@@ -146,7 +176,9 @@ def infer(
     input_queue: queue.Queue,
     output_queue: queue.Queue,
     detection_skip_frames: int = 0,
-    enable_tracking: bool = False
+    enable_tracking: bool = False,
+    max_batches: int = 1,
+    batch_timeout: float = 0.005,
 ):
     """
     Main inference loop with optional frame skipping for tracking optimization.
@@ -157,27 +189,37 @@ def infer(
         output_queue: Queue collecting (input_frame, result) tuples.
         detection_skip_frames: Number of frames to skip between detections when tracking (default: 0).
         enable_tracking: Whether tracking is enabled.
+        max_batches: Most queued batches merged into one submission (default: 1, no merging).
+        batch_timeout: Longest time in seconds spent collecting extra batches (default: 5 ms).
     """
     frame_counter = 0
-
-    while True:
-        next_batch = input_queue.get()
-        if not next_batch:
+    # Detect on the first frame, then once frame_counter reaches next_detect
+    detect_period = detection_skip_frames + 1
+    next_detect = 0
+    done = False
+    # Built once; each job's input_batch is bound by HailoInfer.run with its bindings
+    inference_callback_fn = partial(inference_callback, output_queue=output_queue)
+
+    while not done:
+        batches, done = _gather_batches(input_queue, max_batches, batch_timeout)
+        if not batches:
             break
 
-        input_batch, preprocessed_batch = next_batch
+        if len(batches) == 1:
+            input_batch, preprocessed_batch = batches[0]
+        else:
+            input_batch = [frame for batch in batches for frame in batch[0]]
+            preprocessed_batch = [frame for batch in batches for frame in batch[1]]
 
         # Frame skipping optimization: only run detection every Nth frame when tracking
         if enable_tracking and detection_skip_frames > 0:
             # Run detection on first frame and every (skip_frames + 1)th frame
-            should_detect = (frame_counter % (detection_skip_frames + 1)) == 0
+            should_detect = frame_counter >= next_detect
 
             if should_detect:
+                next_detect = frame_counter + detect_period
                 # Run full inference
-                inference_callback_fn = partial(
-                    inference_callback, input_batch=input_batch, output_queue=output_queue
-                )
-                hailo_inference.run(preprocessed_batch, inference_callback_fn)
+                hailo_inference.run(preprocessed_batch, inference_callback_fn, input_batch=input_batch)
             else:
                 # Skip inference, pass frames with None marker for tracker prediction
                 for frame in input_batch:
@@ -186,14 +228,38 @@ def infer(
             frame_counter += len(input_batch)
         else:
             # Normal mode: run inference on every frame
-            inference_callback_fn = partial(
-                inference_callback, input_batch=input_batch, output_queue=output_queue
-            )
-            hailo_inference.run(preprocessed_batch, inference_callback_fn)
+            hailo_inference.run(preprocessed_batch, inference_callback_fn, input_batch=input_batch)
 
     hailo_inference.close()
 
 
+def _gather_batches(input_queue: queue.Queue, max_batches: int, timeout: float):
+    """
+    Block for one batch, then take batches that are already queued, up to max_batches
+    in total and for at most timeout seconds. Never waits for new batches to arrive,
+    so a single stream sees no added latency.
+
+    Returns:
+        (batches, done) where done is True once the sentinel was consumed.
+    """
+    first = input_queue.get()
+    if not first:
+        return [], True
+
+    batches = [first]
+    deadline = time.monotonic() + timeout
+    while len(batches) < max_batches and time.monotonic() < deadline:
+        try:
+            next_batch = input_queue.get(block=False)
+        except queue.Empty:
+            break
+        if not next_batch:
+            return batches, True
+        batches.append(next_batch)
+
+    return batches, False
+
+
 def inference_callback(
     completion_info, bindings_list: list, input_batch: list, output_queue: queue.Queue
 ) -> None:
@@ -214,7 +280,7 @@ def inference_callback(
                 result = bindings.output().get_buffer()
             else:
                 result = {
-                    name: np.expand_dims(bindings.output(name).get_buffer(), axis=0)
+                    name: bindings.output(name).get_buffer()[None, ...]
                     for name in bindings._output_names
                 }
             output_queue.put((input_batch[i], result))
@@ -254,7 +320,15 @@ def run_detection_pipeline(
         manual_tracking: Whether to enable manual object selection (default: False).
         detection_skip_frames: Number of frames to skip between detections when tracking (default: 0).
                                Set to 4 to run detection every 5th frame (1 detect + 4 track).
+
+    Note:
+        OpenCV's thread pool is capped at half the cores. The preprocess, infer and
+        postprocess threads all call into OpenCV concurrently, and letting each call fan
+        out over every core oversubscribes small edge CPUs.
     """
+    cv2.setNumThreads(max(1, (os.cpu_count() or 2) // 2))
+    cv2.setUseOptimized(True)
+
     config_data = DEFAULT_CONFIG.copy()
     config_data["labels"] = labels
     config_data["print_boxes"] = print_boxes
@@ -275,10 +349,11 @@ def run_detection_pipeline(
     # Create queues
     # Use smaller queues when tracking is enabled to reduce latency
     if enable_tracking or manual_tracking:
-        # Small queues prevent frame buffering and reduce delay
-        input_queue = queue.Queue(maxsize=2)
-        output_queue = queue.Queue(maxsize=2)
-        input_queue = queue.Queue(maxsize=2)
+        # Small queues prevent frame buffering and reduce delay.
+        # preprocess -> infer is single-producer/single-consumer, so it uses the
+        # lock-free ring; output_queue is fed by both the infer thread and the
+        # Hailo callback thread, so it stays a queue.Queue.
+        input_queue = SPSCRing(capacity=2)
         output_queue = queue.Queue(maxsize=2)
         logger.info("Using optimized queue sizes for tracking (maxsize=2)")
     else:
@@ -319,10 +394,6 @@ def run_detection_pipeline(
 
             byte_tracker = BYTETracker(tracker_args)
 
-            if manual_tracking:
-                # Wrap in ManualObjectTracker for manual selection
-                manual_tracker_wrapper = ManualObjectTracker(byte_tracker)
-                tracker = manual_tracker_wrapper
             if manual_tracking:
                 # Wrap in ManualObjectTracker for manual selection
                 manual_tracker_wrapper = ManualObjectTracker(byte_tracker)
@@ -387,9 +458,15 @@ def run_detection_pipeline(
         args=(output_queue, cap, save_output, output_dir, post_process_callback_fn, debug, manual_tracker_wrapper),
     )
 
+    # Micro-batching: merge queued batches into one submission (off by default)
+    micro_batch = (tracking_config or {}).get("micro_batch", {})
     infer_thread = threading.Thread(
         target=infer,
-        args=(hailo_inference, input_queue, output_queue, detection_skip_frames, enable_tracking or manual_tracking)
+        args=(hailo_inference, input_queue, output_queue, detection_skip_frames, enable_tracking or manual_tracking),
+        kwargs={
+            "max_batches": micro_batch.get("max_batches", 1),
+            "batch_timeout": micro_batch.get("timeout_ms", 5) / 1000.0,
+        },
     )
 
     # Start threads
@@ -406,8 +483,6 @@ def run_detection_pipeline(
 
     elapsed_time = time.time() - start_time
 
-    elapsed_time = time.time() - start_time
-
     logger.info(f"{'='*60}")
     logger.info(f"Inference completed successfully!")
     logger.info(f"Total time: {elapsed_time:.2f} seconds")
@@ -447,13 +522,8 @@ def inference_result_handler(
         if tracker is not None:
             predicted_tracks = tracker.predict()
             
-        # Use empty detections for visualization
-        detections = {
-            "detection_boxes": np.array([]),
-            "detection_scores": np.array([]),
-            "detection_classes": np.array([]),
-            "num_detections": 0
-        }
+        # Use empty detections for visualization (shared, read-only)
+        detections = _EMPTY_DETECTIONS
     else:
         # Normal inference - extract detections
         detections = extract_detections(original_frame, infer_results, config_data)
@@ -3,9 +3,14 @@ Post-processing Functions
 Detection extraction and coordinate transformation
 """
 
+import sys
+from collections import namedtuple
+
 import numpy as np
 from typing import List, Dict
 
+from .postprocess_kernels import HAVE_NUMBA, PAD_NONE, PAD_X, PAD_Y, denorm_batch
+
 
 def denormalize_and_rm_pad(
     box: list, size: int, padding_length: int, input_height: int, input_width: int
@@ -47,6 +52,116 @@ def denormalize_and_rm_pad(
     return [box[1], box[0], box[3], box[2]]
 
 
+def denormalize_and_rm_pad_batch(
+    boxes: np.ndarray, size: int, padding_length: int, input_height: int, input_width: int
+) -> np.ndarray:
+    """
+    Vectorized denormalize_and_rm_pad for many boxes at once.
+
+    Args:
+        boxes: (N, 4) normalized coordinates [y1_norm, x1_norm, y2_norm, x2_norm].
+        size: Size to scale the coordinates (max of width/height).
+        padding_length: Length of padding to remove.
+        input_height: Height of the original image.
+        input_width: Width of the original image.
+
+    Returns:
+        (N, 4) integer array of [xmin, ymin, xmax, ymax].
+    """
+    return _denorm_boxes(
+        boxes, size, padding_length, _pad_axis(input_height, input_width)
+    )
+
+
+# Letterbox scalars per image shape; constant for a fixed-resolution stream
+_ShapeParams = namedtuple("_ShapeParams", "size pad pad_axis")
+_shape_cache = {}
+
+
+def _pad_axis(input_height: int, input_width: int) -> int:
+    if input_height < input_width:
+        return PAD_Y
+    if input_width < input_height:
+        return PAD_X
+    return PAD_NONE
+
+
+def _shape_params(input_height: int, input_width: int) -> _ShapeParams:
+    key = (input_height, input_width)
+    params = _shape_cache.get(key)
+    if params is None:
+        params = _ShapeParams(
+            max(input_height, input_width),
+            int(abs(input_height - input_width) / 2),
+            _pad_axis(input_height, input_width),
+        )
+        _shape_cache[key] = params
+    return params
+
+
+def _denorm_boxes(boxes: np.ndarray, size: int, pad: int, pad_axis: int) -> np.ndarray:
+    if HAVE_NUMBA:
+        return denorm_batch(np.ascontiguousarray(boxes, dtype=np.float32), size, pad, pad_axis)
+
+    # Stay in float32 and cast once at the end. floor() before removing the padding
+    # matches int() truncation in the scalar version (scaled values are >= 0).
+    scaled = np.multiply(boxes, size, dtype=np.float32)
+    np.floor(scaled, out=scaled)
+    if pad_axis == PAD_Y:
+        scaled[:, 0::2] -= pad
+    elif pad_axis == PAD_X:
+        scaled[:, 1::2] -= pad
+
+    # [y1, x1, y2, x2] -> [xmin, ymin, xmax, ymax]
+    return scaled[:, [1, 0, 3, 2]].astype(np.int32)
+
+
+def _format_detection(idx: int, score: float, class_id: int, box: list, labels: list) -> str:
+    """
+    Report block for one detection; box is [xmin, ymin, xmax, ymax].
+    """
+    xmin, ymin, xmax, ymax = box
+    width = xmax - xmin
+    height = ymax - ymin
+    class_name = labels[class_id] if class_id < len(labels) else f"Class_{class_id}"
+    return (
+        f"Detection {idx+1}:\n"
+        f"  Class: {class_name} (ID: {class_id})\n"
+        f"  Confidence: {score*100:.2f}%\n"
+        f"  BBox [xmin, ymin, xmax, ymax]: [{xmin}, {ymin}, {xmax}, {ymax}]\n"
+        f"  BBox [x, y, width, height]: [{xmin}, {ymin}, {width}, {height}]\n"
+    )
+
+
+def _top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the k highest scores, highest first.
+
+    argpartition selects the top k in O(N); only those k are then sorted.
+    """
+    k = min(k, scores.size)
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if k < scores.size:
+        idx = np.argpartition(-scores, k - 1)[:k]
+    else:
+        idx = np.arange(scores.size)
+    return idx[np.argsort(-scores[idx], kind="stable")]
+
+
+def _target_class_ids(labels: list, target_classes) -> set:
+    """
+    Class ids for the configured target_classes (case-insensitive), or None for all.
+    """
+    if not target_classes:
+        return None
+    # First index wins for duplicate labels, as in a forward scan
+    label_idx = {}
+    for idx, label in enumerate(labels):
+        label_idx.setdefault(label.lower(), idx)
+    return {label_idx[name.lower()] for name in target_classes if name.lower() in label_idx}
+
+
 def extract_detections(image: np.ndarray, detections: list, config_data: dict) -> dict:
     """
     Extract detections from the raw model output.
@@ -57,86 +172,119 @@ def extract_detections(image: np.ndarray, detections: list, config_data: dict) -
         config_data: Configuration containing post-processing metadata and labels.
 
     Returns:
-        Dictionary containing filtered detection results.
+        Dictionary containing filtered detection results as parallel arrays,
+        sorted by score descending.
+    """
+    labels = config_data.get("labels", [])
+    target_class_ids = _target_class_ids(labels, config_data.get("target_classes", None))
+
+    # Only visit the requested classes when target_classes is specified
+    if target_class_ids is not None:
+        class_ids_to_scan = sorted(c for c in target_class_ids if c < len(detections))
+    else:
+        class_ids_to_scan = range(len(detections))
+
+    # Stack the per-class arrays into one (N, 6) [y1, x1, y2, x2, score, class_id]
+    flat_chunks = []
+    for class_id in class_ids_to_scan:
+        detection = detections[class_id]
+
+        # Skip empty detection arrays
+        if isinstance(detection, np.ndarray) and detection.size == 0:
+            continue
+
+        detection = np.asarray(detection)
+        # Ensure rows have at least 5 elements (4 bbox coords + 1 score)
+        if detection.ndim != 2 or detection.shape[1] < 5 or len(detection) == 0:
+            continue
+
+        chunk = np.empty((len(detection), 6), dtype=np.float32)
+        chunk[:, :5] = detection[:, :5]
+        chunk[:, 5] = class_id
+        flat_chunks.append(chunk)
+
+    if flat_chunks:
+        detections_flat = np.concatenate(flat_chunks)
+    else:
+        detections_flat = np.empty((0, 6), dtype=np.float32)
+
+    # Classes are already filtered above
+    return _extract_flat(image, detections_flat, config_data, labels, None)
+
+
+def extract_detections_flat(image: np.ndarray, detections_flat: np.ndarray, config_data: dict) -> dict:
+    """
+    Extract detections from a single flat model output.
+
+    Args:
+        image: Image to draw on.
+        detections_flat: (N, 6) array of [y1_norm, x1_norm, y2_norm, x2_norm, score, class_id].
+        config_data: Configuration containing post-processing metadata and labels.
+
+    Returns:
+        Same dictionary as extract_detections().
     """
+    labels = config_data.get("labels", [])
+    target_class_ids = _target_class_ids(labels, config_data.get("target_classes", None))
+    return _extract_flat(
+        image, np.asarray(detections_flat).reshape(-1, 6), config_data, labels, target_class_ids
+    )
+
+
+def _extract_flat(
+    image: np.ndarray, detections_flat: np.ndarray, config_data: dict, labels: list, target_class_ids
+) -> dict:
     visualization_params = config_data["visualization_params"]
     score_threshold = visualization_params.get("score_thres", 0.25)
     max_boxes = visualization_params.get("max_boxes_to_draw", 500)
     print_boxes = config_data.get("print_boxes", True)
-    labels = config_data.get("labels", [])
-    target_classes = config_data.get("target_classes", None)
-
-    # Build target class IDs if target_classes is specified
-    target_class_ids = None
-    if target_classes and len(target_classes) > 0:
-        target_class_ids = set()
-        for class_name in target_classes:
-            # Find class_id for this class_name
-            for idx, label in enumerate(labels):
-                if label.lower() == class_name.lower():
-                    target_class_ids.add(idx)
-                    break
 
     img_height, img_width = image.shape[:2]
-    size = max(img_height, img_width)
-    padding_length = int(abs(img_height - img_width) / 2)
+    size, padding_length, pad_axis = _shape_params(img_height, img_width)
 
-    all_detections = []
+    # One pass per stage over all classes: score mask, class mask, denormalize
+    keep = detections_flat[:, 4] >= score_threshold
+    if target_class_ids is not None:
+        keep &= np.isin(
+            detections_flat[:, 5].astype(np.int32),
+            np.fromiter(target_class_ids, dtype=np.int32, count=len(target_class_ids)),
+        )
+    kept = detections_flat[keep]
 
-    for class_id, detection in enumerate(detections):
-        # Skip this class if target_classes is specified and this class is not in it
-        if target_class_ids is not None and class_id not in target_class_ids:
-            continue
+    if len(kept):
+        boxes = _denorm_boxes(kept[:, :4], size, padding_length, pad_axis)
+        scores = kept[:, 4].astype(np.float32)
+        class_ids = kept[:, 5].astype(np.int32)
 
-        # Skip empty detection arrays
-        if isinstance(detection, np.ndarray) and detection.size == 0:
-            continue
+        # Take top max_boxes, sorted by score descending
+        order = _top_k_indices(scores, max_boxes)
+        boxes, scores, class_ids = boxes[order], scores[order], class_ids[order]
+    else:
+        boxes = np.empty((0, 4), dtype=np.int32)
+        scores = np.empty(0, dtype=np.float32)
+        class_ids = np.empty(0, dtype=np.int32)
+
+    num_detections = len(scores)
 
-        for det in detection:
-            # Ensure det has at least 5 elements (4 bbox coords + 1 score)
-            if len(det) < 5:
-                continue
-            bbox, score = det[:4], det[4]
-            if score >= score_threshold:
-                denorm_bbox = denormalize_and_rm_pad(
-                    bbox, size, padding_length, img_height, img_width
-                )
-                all_detections.append((score, class_id, denorm_bbox))
-
-    # Sort by score descending
-    all_detections.sort(reverse=True, key=lambda x: x[0])
-
-    # Take top max_boxes
-    top_detections = all_detections[:max_boxes]
-
-    scores, class_ids, boxes = zip(*top_detections) if top_detections else ([], [], [])
-
-    # Print bounding boxes in original image coordinates
-    if print_boxes and top_detections:
-        labels = config_data.get("labels", [])
-        print(f"\n{'='*80}")
-        print(f"Image Resolution: {img_width}x{img_height}")
-        print(f"Detections: {len(top_detections)}")
-        print(f"{'='*80}")
-        for idx, (score, class_id, box) in enumerate(top_detections):
-            # box is [xmin, ymin, xmax, ymax]
-            xmin, ymin, xmax, ymax = box[0], box[1], box[2], box[3]
-
-            width = xmax - xmin
-            height = ymax - ymin
-            class_name = (
-                labels[class_id] if class_id < len(labels) else f"Class_{class_id}"
+    # Print bounding boxes in original image coordinates, as one write
+    if print_boxes and num_detections:
+        lines = [
+            f"\n{'='*80}",
+            f"Image Resolution: {img_width}x{img_height}",
+            f"Detections: {num_detections}",
+            f"{'='*80}",
+        ]
+        lines.extend(
+            _format_detection(idx, score, class_id, box, labels)
+            for idx, (score, class_id, box) in enumerate(
+                zip(scores.tolist(), class_ids.tolist(), boxes.tolist())
             )
-            print(f"Detection {idx+1}:")
-            print(f"  Class: {class_name} (ID: {class_id})")
-            print(f"  Confidence: {score*100:.2f}%")
-            print(f"  BBox [xmin, ymin, xmax, ymax]: [{xmin}, {ymin}, {xmax}, {ymax}]")
-            print(f"  BBox [x, y, width, height]: [{xmin}, {ymin}, {width}, {height}]")
-            print()
+        )
+        sys.stdout.write("\n".join(lines) + "\n")
 
     return {
-        "detection_boxes": list(boxes),
-        "detection_classes": list(class_ids),
-        "detection_scores": list(scores),
-        "num_detections": len(top_detections),
+        "detection_boxes": boxes,
+        "detection_classes": class_ids,
+        "detection_scores": scores,
+        "num_detections": num_detections,
     }
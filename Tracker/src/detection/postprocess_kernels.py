@@ -0,0 +1,106 @@
+"""
+Post-processing Kernels
+Optional Numba-compiled helpers for the per-frame post-processing hot path
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+
+# pad_axis values for denorm_batch
+PAD_NONE = -1
+PAD_Y = 0
+PAD_X = 1
+
+
+if HAVE_NUMBA:
+
+    @njit(cache=True, fastmath=True)
+    def denorm_batch(boxes, size, pad, pad_axis):
+        """
+        Fused denormalize_and_rm_pad_batch: scale, truncate, remove padding and
+        reorder [y1, x1, y2, x2] -> [xmin, ymin, xmax, ymax] in a single loop.
+
+        Args:
+            boxes: (N, 4) float32 normalized [y1, x1, y2, x2].
+            size: Size to scale the coordinates (max of width/height).
+            pad: Length of padding to remove.
+            pad_axis: PAD_Y, PAD_X or PAD_NONE.
+
+        Returns:
+            (N, 4) int32 array of [xmin, ymin, xmax, ymax].
+        """
+        n = boxes.shape[0]
+        out = np.empty((n, 4), dtype=np.int32)
+        pad_y = pad if pad_axis == 0 else 0
+        pad_x = pad if pad_axis == 1 else 0
+        for i in range(n):
+            out[i, 0] = int(boxes[i, 1] * size) - pad_x
+            out[i, 1] = int(boxes[i, 0] * size) - pad_y
+            out[i, 2] = int(boxes[i, 3] * size) - pad_x
+            out[i, 3] = int(boxes[i, 2] * size) - pad_y
+        return out
+
+else:
+    denorm_batch = None
+
+
+if HAVE_NUMBA:
+
+    @njit(cache=True, fastmath=True)
+    def smooth_tracks(track_ids, tlwhs, state, owners, last_seen, frame_no, mask, alpha):
+        """
+        BBoxSmoother.smooth_tracks core: tlwh -> xyxy, EMA against the slot table
+        (updated in place), rounding and center points for all tracks in one call.
+
+        Args:
+            track_ids: (T,) int64 track ids.
+            tlwhs: (T, 4) float32 [x, y, w, h].
+            state: (S, 4) float32 smoothed [xmin, ymin, xmax, ymax] per slot.
+            owners: (S,) int64 track id owning each slot, -1 when free.
+            last_seen: (S,) int64 frame number of each slot's last update.
+            frame_no: Current frame number.
+            mask: S - 1 (S is a power of two).
+            alpha: Smoothing factor.
+
+        Returns:
+            (T, 4) int32 smoothed boxes and (T, 2) int32 centers.
+        """
+        n = track_ids.shape[0]
+        boxes = np.empty((n, 4), dtype=np.int32)
+        centers = np.empty((n, 2), dtype=np.int32)
+        one_minus = 1.0 - alpha
+        for i in range(n):
+            tid = track_ids[i]
+            slot = tid & mask
+            x1 = tlwhs[i, 0]
+            y1 = tlwhs[i, 1]
+            x2 = x1 + tlwhs[i, 2]
+            y2 = y1 + tlwhs[i, 3]
+            if owners[slot] != tid:
+                owners[slot] = tid
+            else:
+                x1 = alpha * x1 + one_minus * state[slot, 0]
+                y1 = alpha * y1 + one_minus * state[slot, 1]
+                x2 = alpha * x2 + one_minus * state[slot, 2]
+                y2 = alpha * y2 + one_minus * state[slot, 3]
+            state[slot, 0] = x1
+            state[slot, 1] = y1
+            state[slot, 2] = x2
+            state[slot, 3] = y2
+            last_seen[slot] = frame_no
+            boxes[i, 0] = np.int32(np.rint(x1))
+            boxes[i, 1] = np.int32(np.rint(y1))
+            boxes[i, 2] = np.int32(np.rint(x2))
+            boxes[i, 3] = np.int32(np.rint(y2))
+            centers[i, 0] = np.int32((boxes[i, 0] + boxes[i, 2]) / 2)
+            centers[i, 1] = np.int32((boxes[i, 1] + boxes[i, 3]) / 2)
+        return boxes, centers
+
+else:
+    smooth_tracks = None
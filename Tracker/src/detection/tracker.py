@@ -4,6 +4,16 @@ import cv2
 from src.core.config import cfg
 from src.detection.bytetracker.byte_tracker import BYTETracker
 
+def _to_tlbr_scores(confs, boxes):
+    """
+    ByteTracker input [[x1, y1, x2, y2, score], ...] from SoA detections.
+    """
+    dets = np.empty((len(boxes), 5), dtype=np.float32)
+    dets[:, :2] = boxes[:, :2]
+    dets[:, 2:4] = boxes[:, :2] + boxes[:, 2:]
+    dets[:, 4] = confs
+    return dets
+
 class ObjectTracker:
     def __init__(self, detector=None):
         self.tracker_type = cfg.get("tracking.tracker_type", "CSRT")
@@ -11,7 +21,14 @@ class ObjectTracker:
         self.tracking_active = False
         self.detector = detector # Reference to detector for ByteTracker
         self.tracked_id = None   # ID to follow in ByteTracker mode
-        self.lock = threading.Lock() # Thread safety lock
+        self._pipelined_frame = None # Frame whose detection is in flight (update_pipelined)
+        # Sequence counter so update() can read without a lock: init()/stop() make
+        # it odd while they publish new state and even again after. update()
+        # snapshots on an even value and drops its result if it changed.
+        # Writers run on several threads (loop, API), and `+=` isn't atomic across
+        # Python versions, so every write to the published state takes _write_lock.
+        self._gen = 0
+        self._write_lock = threading.Lock()
         
         # ByteTracker args from config
         class Args:
@@ -41,113 +58,159 @@ class ObjectTracker:
         Initialize tracker with frame and bbox (x, y, w, h)
         For ByteTracker, we find the object matching this bbox to get its ID.
         """
-        with self.lock:
-            self.tracker = self._create_tracker()
-            self.tracking_active = True
-            
-            if self.tracker_type == 'BYTE':
-                 # In ByteTracker, 'init' implies finding the ID of the object at bbox
-                 # We need to run detection once to find the ID
-                 if self.detector:
-                     detections = self.detector.detect(frame)
-                     # Find match
-                     x, y, w, h = bbox
-                     mx, my = x + w/2, y + h/2
-                     
-                     best_iou = 0
+        # Built on locals and published at the end, so update() never sees a
+        # half-initialized tracker
+        tracker = self._create_tracker()
+        tracking_active = True
+        tracked_id = self.tracked_id
+        
+        if self.tracker_type == 'BYTE':
+             # In ByteTracker, 'init' implies finding the ID of the object at bbox
+             # We need to run detection once to find the ID
+             if self.detector:
+                 _, confs, boxes = self.detector.detect_arrays(frame)
+                 # Find match
+                 x, y, w, h = bbox
+                 mx, my = x + w/2, y + h/2
+                 
+                 # Prepare detections for ByteTracker to initialize internal state
+                 # Format: [[x1, y1, x2, y2, score], ...]
+                 if len(boxes):
+                     dets_np = _to_tlbr_scores(confs, boxes)
+                     ids, tlwh = tracker.update_arrays(dets_np)
+
+                     # Nearest track center, compared squared (100 px threshold)
                      best_id = None
-                     
-                     min_dist = float('inf')
-                     
-                     # Prepare detections for ByteTracker to initialize internal state
-                     # Format: [[x1, y1, x2, y2, score], ...]
-                     formatted_dets = []
-                     for label, score, (dx, dy, dw, dh) in detections:
-                         formatted_dets.append([dx, dy, dx+dw, dy+dh, score])
-                     
-                     if formatted_dets:
-                         dets_np = np.array(formatted_dets, dtype=float)
-                         online_targets = self.tracker.update(dets_np)
-                         
-                         for t in online_targets:
-                             tx, ty, tw, th = t.tlwh
-                             tcx, tcy = tx + tw/2, ty + th/2
-                             dist = ((tcx - mx)**2 + (tcy - my)**2)**0.5
-                             
-                             if dist < min_dist:
-                                 min_dist = dist
-                                 best_id = t.track_id
-                         
-                         if best_id is not None and min_dist < 100: # Threshold
-                             self.tracked_id = best_id
-                             print(f"[INFO] ByteTracker locked on ID: {self.tracked_id}")
-                         else:
-                             print("[WARN] ByteTracker could not match init bbox to an object ID")
-                             self.tracking_active = False
-                 else:
-                     print("[ERROR] ByteTracker requires a detector!")
-                     self.tracking_active = False
-
-            else:
-                self.tracker.init(frame, bbox)
-                
-            print(f"[INFO] Tracker initialized ({self.tracker_type})")
+                     if len(ids):
+                         cx = tlwh[:, 0] + tlwh[:, 2] * 0.5
+                         cy = tlwh[:, 1] + tlwh[:, 3] * 0.5
+                         d2 = (cx - mx)**2 + (cy - my)**2
+                         i = int(d2.argmin())
+                         if d2[i] < 100 * 100:
+                             best_id = int(ids[i])
+
+                     if best_id is not None:
+                         tracked_id = best_id
+                         print(f"[INFO] ByteTracker locked on ID: {tracked_id}")
+                     else:
+                         print("[WARN] ByteTracker could not match init bbox to an object ID")
+                         tracking_active = False
+             else:
+                 print("[ERROR] ByteTracker requires a detector!")
+                 tracking_active = False
+
+        else:
+            tracker.init(frame, bbox)
+            
+        with self._write_lock:
+            self._gen += 1
+            self.tracker = tracker
+            self.tracked_id = tracked_id
+            self.tracking_active = tracking_active
+            self._gen += 1
+        print(f"[INFO] Tracker initialized ({self.tracker_type})")
 
     def update(self, frame):
         """
         Update tracker.
         Returns (success, bbox)
         """
-        # Run detection outside lock if possible to minimize blocking? 
-        # But for ByteTracker we need detection first.
-        # Actually ByteTracker update IS fast, detection is the slow part.
-        # For thread safety, we must hold lock when accessing self.tracker.
-        
-        # However, detector.detect is slow. We should perhaps run it without lock?
-        # BUT, if we stop tracking mid-detection, we shouldn't update the tracker.
-        
+        # Runs on a snapshot of the tracker state; stop() never waits on a frame in
+        # progress, and a result from a stopped/replaced tracker is dropped.
         detections = None
         if self.tracker_type == 'BYTE' and self.detector and self.tracking_active:
-             detections = self.detector.detect(frame)
-
-        with self.lock:
-            if not self.tracking_active or self.tracker is None:
-                return False, None
-                
-            if self.tracker_type == 'BYTE':
-                if not detections:
-                    return False, None
-                
-                # 2. Format for ByteTracker
-                formatted_dets = []
-                for label, score, (x, y, w, h) in detections:
-                    formatted_dets.append([x, y, x+w, y+h, score])
-                
-                if not formatted_dets:
-                     formatted_dets = np.empty((0, 5))
-                else:
-                     formatted_dets = np.array(formatted_dets, dtype=float)
-
-                # 3. Update Tracker
-                online_targets = self.tracker.update(formatted_dets)
-                
-                # 4. Find our locked ID
-                for t in online_targets:
-                    if t.track_id == self.tracked_id:
-                        x, y, w, h = t.tlwh
-                        return True, (x, y, w, h)
-                
-                return False, None
-
-            else:
-                success, bbox = self.tracker.update(frame)
-                if not success:
+             detections = self.detector.detect_arrays(frame)
+
+        snapshot = self._snapshot()
+        if snapshot is None:
+            return False, None
+        gen, tracker, tracked_id = snapshot
+
+        if self.tracker_type == 'BYTE':
+            return self._commit(gen, self._update_byte(tracker, tracked_id, detections))
+
+        success, bbox = tracker.update(frame)
+        if not success:
+            # Under the lock so a concurrent init() can't be switched off
+            with self._write_lock:
+                if self._gen == gen:
                     self.tracking_active = False # Lost tracking
-                    
-                return success, bbox
+        return self._commit(gen, (success, bbox))
+
+    def update_pipelined(self, current_frame, next_frame):
+        """
+        ByteTracker update for current_frame that keeps the NPU busy with next_frame
+        while the tracker association runs. Pass consecutive frames: the next_frame of
+        one call is the current_frame of the next. Other tracker types use update().
+        Returns (success, bbox)
+        """
+        if self.tracker_type != 'BYTE' or not (self.detector and self.tracking_active):
+            return self.update(current_frame)
+
+        if self._pipelined_frame is not current_frame:
+            # First call, or the caller skipped a frame: get current_frame in flight
+            # (and drop whatever was pending before it)
+            self.detector.detect_arrays_pipelined(current_frame)
+        # Collects current_frame, leaves next_frame running on the detector's worker
+        detections = self.detector.detect_arrays_pipelined(next_frame)
+        self._pipelined_frame = next_frame
+
+        snapshot = self._snapshot()
+        if snapshot is None:
+            return False, None
+        gen, tracker, tracked_id = snapshot
+        return self._commit(gen, self._update_byte(tracker, tracked_id, detections))
+
+    def _snapshot(self):
+        """
+        (generation, tracker, tracked_id) to run this frame against, or None when
+        inactive or when init()/stop() is publishing.
+        """
+        gen = self._gen
+        if gen & 1:
+            return None
+        tracker = self.tracker
+        tracked_id = self.tracked_id
+        if not self.tracking_active or tracker is None or self._gen != gen:
+            return None
+        return gen, tracker, tracked_id
+
+    def _commit(self, gen, result):
+        """
+        Drop a result computed on a tracker that was stopped or replaced meanwhile.
+        """
+        if self._gen != gen:
+            return False, None
+        return result
+
+    @staticmethod
+    def _update_byte(tracker, tracked_id, detections):
+        """
+        Feed one frame of detections to ByteTracker and look up the locked ID.
+        """
+        if detections is None or len(detections[2]) == 0:
+            return False, None
+
+        # Format for ByteTracker
+        _, confs, boxes = detections
+        formatted_dets = _to_tlbr_scores(confs, boxes)
+
+        # Update Tracker
+        ids, tlwhs = tracker.update_arrays(formatted_dets)
+
+        # Find our locked ID
+        match = np.flatnonzero(ids == tracked_id) if tracked_id is not None else ()
+        if len(match):
+            x, y, w, h = tlwhs[match[0]].tolist()
+            return True, (x, y, w, h)
+
+        return False, None
 
     def stop(self):
-        with self.lock:
+        with self._write_lock:
+            self._gen += 1
             self.tracker = None
             self.tracking_active = False
             self.tracked_id = None
+            self._pipelined_frame = None
+            self._gen += 1
@@ -4,32 +4,62 @@ Drawing detections on images and displaying results
 """
 
 import os
+import logging
 import cv2
 import queue
+import threading
 import numpy as np
-from typing import List, Optional, Callable
+from collections import namedtuple
+from functools import lru_cache, partial
+from typing import List, Optional, Callable, Tuple
+
+from src.utils.logger import get_logger
+from .postprocess_kernels import HAVE_NUMBA, smooth_tracks
+
+logger = get_logger(__name__)
 
 # from ..streaming import get_streaming_queue
 
 
-def id_to_color(idx: int) -> np.ndarray:
-    """Generate a unique color for a given ID."""
-    np.random.seed(idx)
-    return np.random.randint(0, 255, size=3, dtype=np.uint8)
+@lru_cache(maxsize=4096)
+def id_to_color(idx: int) -> Tuple[int, int, int]:
+    """Generate a unique color for a given ID (splitmix64 hash, no global RNG state)."""
+    mask = 0xFFFFFFFFFFFFFFFF
+    h = (int(idx) + 0x9E3779B97F4A7C15) & mask
+    h = ((h ^ (h >> 30)) * 0xBF58476D1CE4E5B9) & mask
+    h = ((h ^ (h >> 27)) * 0x94D049BB133111EB) & mask
+    h ^= h >> 31
+    return (h & 0xFF, (h >> 8) & 0xFF, (h >> 16) & 0xFF)
 
 
 class BBoxSmoother:
     """
     Smooth bounding box coordinates using exponential moving average to reduce flickering.
+
+    State lives in fixed-size arrays indexed by track_id modulo the slot count
+    (a direct-mapped table): no hashing or per-track allocation. A slot remembers
+    which track owns it, so a track that lands on a reused slot starts fresh.
     """
-    def __init__(self, alpha: float = 0.6):
+    def __init__(self, alpha: float = 0.6, max_age: int = 30, slots: int = 1024):
         """
         Args:
             alpha: Smoothing factor (0-1). Higher = more responsive, Lower = smoother.
                    0.6 provides good balance for moving objects.
+            max_age: Frames (tick() calls) a track may go unseen before its history
+                     is dropped.
+            slots: Table size, a power of two; more than the live tracks at once.
         """
+        if slots < 1 or slots & (slots - 1):
+            raise ValueError(f"slots must be a power of two, got {slots}")
         self.alpha = alpha
-        self.smoothed_boxes = {}  # track_id -> [xmin, ymin, xmax, ymax]
+        self._alpha32 = np.float32(alpha)
+        self._one_minus = np.float32(1 - alpha)
+        self.max_age = max_age
+        self._mask = slots - 1
+        self._boxes = np.zeros((slots, 4), dtype=np.float32)  # [xmin, ymin, xmax, ymax]
+        self._ids = np.full(slots, -1, dtype=np.int64)  # owning track_id, -1 = free
+        self._last_seen = np.zeros(slots, dtype=np.int64)  # frame of the last smooth()
+        self._frame_no = 0
 
     def smooth(self, track_id: int, bbox: List[float]) -> List[int]:
         """
@@ -42,29 +72,170 @@ class BBoxSmoother:
         Returns:
             Smoothed bounding box [xmin, ymin, xmax, ymax]
         """
-        if track_id not in self.smoothed_boxes:
+        slot = track_id & self._mask
+        state = self._boxes[slot]  # view into the table
+        self._last_seen[slot] = self._frame_no
+        if self._ids[slot] != track_id:
             # First occurrence - initialize with current box
-            self.smoothed_boxes[track_id] = bbox
-            return [int(x) for x in bbox]
-
-        # Apply exponential moving average: smoothed = alpha * current + (1-alpha) * previous
-        prev = self.smoothed_boxes[track_id]
-        smoothed = [
-            self.alpha * bbox[i] + (1 - self.alpha) * prev[i]
-            for i in range(4)
-        ]
-        self.smoothed_boxes[track_id] = smoothed
-        return [int(x) for x in smoothed]
+            self._ids[slot] = track_id
+            state[:] = bbox
+        else:
+            # Apply exponential moving average: smoothed = alpha * current + (1-alpha) * previous
+            state *= self._one_minus
+            state += self._alpha32 * np.asarray(bbox, dtype=np.float32)
+        # Round rather than truncate: fewer 1 px jitters between frames
+        return np.rint(state).astype(np.int32).tolist()
+
+    def smooth_tracks(self, track_ids: List[int], tlwhs) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        smooth() for a whole frame of tracks given as tlwh.
+
+        Args:
+            track_ids: Track identifiers, one per track.
+            tlwhs: (T, 4) current boxes as [x, y, w, h].
+
+        Returns:
+            ((T, 4) int32 smoothed [xmin, ymin, xmax, ymax], (T, 2) int32 centers)
+        """
+        ids = np.asarray(track_ids, dtype=np.int64).reshape(-1)
+        tlwhs = np.asarray(tlwhs, dtype=np.float32).reshape(-1, 4)
+        if HAVE_NUMBA:
+            return smooth_tracks(
+                ids, tlwhs, self._boxes, self._ids, self._last_seen,
+                self._frame_no, self._mask, self._alpha32,
+            )
+
+        xyxy = tlwhs.copy()
+        xyxy[:, 2:] += xyxy[:, :2]
+        slots = ids & self._mask
+        known = self._ids[slots] == ids
+        smoothed = np.where(
+            known[:, None], self._one_minus * self._boxes[slots] + self._alpha32 * xyxy, xyxy
+        )
+        self._boxes[slots] = smoothed
+        self._ids[slots] = ids
+        self._last_seen[slots] = self._frame_no
+
+        boxes = np.rint(smoothed).astype(np.int32)
+        centers = ((boxes[:, :2] + boxes[:, 2:]) / 2).astype(np.int32)
+        return boxes, centers
 
     def reset(self, track_id: int):
         """Remove smoothing history for a track (when track is lost)."""
-        if track_id in self.smoothed_boxes:
-            del self.smoothed_boxes[track_id]
+        slot = track_id & self._mask
+        if self._ids[slot] == track_id:
+            self._ids[slot] = -1
+
+    def tick(self):
+        """
+        End of frame: drop tracks not smoothed for more than max_age frames, so lost
+        tracks that were never reset() don't keep their slot.
+        """
+        self._frame_no += 1
+        stale = self._last_seen < self._frame_no - self.max_age
+        self._ids[stale] = -1
 
 
 # Global bbox smoother instance
 _bbox_smoother = BBoxSmoother(alpha=0.6)
 
+# Bound once for the per-track draw calls
+_FONT = cv2.FONT_HERSHEY_SIMPLEX
+_LA = cv2.LINE_AA
+_PUT = cv2.putText
+_TEXT_COLOR = (255, 255, 255)  # White
+_BORDER_COLOR = (0, 0, 0)  # Black
+
+
+def _text(img: np.ndarray, text: str, org: tuple, scale: float, thickness: int, border: int):
+    """White text with a black border."""
+    _PUT(img, text, org, _FONT, scale, _BORDER_COLOR, border, _LA)
+    _PUT(img, text, org, _FONT, scale, _TEXT_COLOR, thickness, _LA)
+
+
+def _center_marker(img: np.ndarray, center: tuple, color: tuple, size: int, thickness: int, radius: int):
+    """Crosshair with a filled dot at the track center."""
+    cv2.drawMarker(img, center, color, markerType=cv2.MARKER_CROSS, markerSize=size, thickness=thickness)
+    cv2.circle(img, center, radius, color, -1)
+
+
+def _match_detection(det_tl: np.ndarray, xmin: float, ymin: float, tol: float = 10) -> int:
+    """
+    Index of the detection whose top-left corner is nearest (xmin, ymin) and within
+    tol pixels on both axes, or -1.
+    """
+    if len(det_tl) == 0:
+        return -1
+    d = np.abs(det_tl - np.array((xmin, ymin), dtype=np.float32)).max(axis=1)
+    j = int(d.argmin())
+    return j if d[j] < tol else -1
+
+
+def _track_detection_index(track, det_tl: np.ndarray, xmin: float, ymin: float, fresh: bool) -> int:
+    """
+    Detection index for a track: the row ByteTracker matched it to when the tracks
+    come from these detections, else the nearest-corner match.
+    """
+    if fresh:
+        j = getattr(track, "det_idx", -1)
+        if 0 <= j < len(det_tl):
+            return j
+    return _match_detection(det_tl, xmin, ymin)
+
+
+# Per-mode drawing parameters for _draw_track. color None means id_to_color(track_id).
+_TrackStyle = namedtuple(
+    "_TrackStyle",
+    "color rect_th marker_sz marker_th dot_r prefix title_dy text_scale "
+    "text_th text_border coord_d coord_scale",
+)
+# Selected object in manual mode: green, thicker border and larger text
+_MANUAL_STYLE = _TrackStyle((0, 255, 0), 4, 20, 3, 5, "TRACKING ID", 25, 0.6, 2, 3, 10, 0.5)
+_AUTO_STYLE = _TrackStyle(None, 2, 15, 2, 4, "ID", 20, 0.5, 1, 2, 8, 0.4)
+
+
+def _draw_track(
+    img: np.ndarray, track, box: list, center: list, det_tl: np.ndarray,
+    fresh: bool, classes, scores, labels: List[str], style: _TrackStyle,
+) -> Tuple[int, int]:
+    """
+    Draw one smoothed track (box, center marker, label and center coordinates).
+
+    Returns:
+        Tuple[int, int]: The track's center point (x, y).
+    """
+    track_id = track.track_id
+    xmin, ymin, xmax, ymax = box
+    center_x, center_y = center
+    # Use track_id for color to maintain consistent colors
+    color = style.color if style.color is not None else id_to_color(track_id)
+
+    # Find the class label for this track (match with detection)
+    label = "tracked"
+    score = 0.0
+    idx = _track_detection_index(track, det_tl, xmin, ymin, fresh)
+    if idx >= 0:
+        label = labels[classes[idx]]
+        score = scores[idx] * 100.0
+
+    # Log center point coordinates (formatted only when DEBUG is enabled)
+    logger.debug("[TRACKING] ID%s (%s): Center point = (%d, %d)",
+                 track_id, label, center_x, center_y)
+
+    cv2.rectangle(img, (xmin, ymin), (xmax, ymax), color, style.rect_th)
+
+    # Draw center point marker (crosshair + dot)
+    _center_marker(img, (center_x, center_y), color, style.marker_sz, style.marker_th, style.dot_r)
+
+    _text(img, f"{style.prefix}{track_id}: {label} {score:.1f}%",
+          (xmin + 4, ymin + style.title_dy), style.text_scale, style.text_th, style.text_border)
+
+    # Display center coordinates on frame
+    d = style.coord_d
+    _text(img, f"({center_x}, {center_y})",
+          (center_x + d, center_y - d), style.coord_scale, style.text_th, style.text_border)
+    return center_x, center_y
+
 
 def draw_detection(
     image: np.ndarray, box: list, label: str, score: float, color: tuple
@@ -81,19 +252,9 @@ def draw_detection(
     """
     xmin, ymin, xmax, ymax = map(int, box)
     cv2.rectangle(image, (xmin, ymin), (xmax, ymax), color, 2)
-    font = cv2.FONT_HERSHEY_SIMPLEX
-
-    text = f"{label}: {score:.1f}%"
-    text_color = (255, 255, 255)  # White
-    border_color = (0, 0, 0)  # Black
 
     # Draw text with black border
-    cv2.putText(
-        image, text, (xmin + 4, ymin + 20), font, 0.5, border_color, 2, cv2.LINE_AA
-    )
-    cv2.putText(
-        image, text, (xmin + 4, ymin + 20), font, 0.5, text_color, 1, cv2.LINE_AA
-    )
+    _text(image, f"{label}: {score:.1f}%", (xmin + 4, ymin + 20), 0.5, 1, 2)
 
 
 def draw_detections(
@@ -127,29 +288,35 @@ def draw_detections(
     scores = detections["detection_scores"]
     num_detections = detections["num_detections"]
     classes = detections["detection_classes"]
+    # Detection top-left corners, for matching tracks back to their detection
+    det_tl = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)[:num_detections, :2]
 
     # If tracking is enabled
     if (tracker is not None or tracks is not None) and img_height is not None and img_width is not None:
+        # Tracks from this call's tracker.update carry the index of their detection
+        fresh_tracks = tracks is None
         if tracks is not None:
             # Use precomputed tracks (e.g. from prediction on skipped frame)
             online_targets = tracks
         else:
             # Convert detections to ByteTracker format
             # ByteTracker expects: [[x1, y1, x2, y2, score], ...]
-            dets_for_tracker = []
-            for idx in range(num_detections):
-                box = boxes[idx]
-                score = scores[idx]
-                # box is [xmin, ymin, xmax, ymax]
-                dets_for_tracker.append([box[0], box[1], box[2], box[3], score])
-
-            # Update tracker
-            if len(dets_for_tracker) > 0:
-                dets_array = np.array(dets_for_tracker)
+            if num_detections > 0:
+                # boxes are [xmin, ymin, xmax, ymax]
+                dets_array = np.column_stack((
+                    np.asarray(boxes[:num_detections], dtype=np.float32),
+                    np.asarray(scores[:num_detections], dtype=np.float32),
+                ))
                 online_targets = tracker.update(dets_array)
             else:
                 online_targets = []
 
+        # tlwh -> smoothed xyxy and center points for every track in one call
+        track_boxes, track_centers = _bbox_smoother.smooth_tracks(
+            [t.track_id for t in online_targets], [t.tlwh for t in online_targets]
+        )
+        track_boxes, track_centers = track_boxes.tolist(), track_centers.tolist()
+
         if manual_tracking:
             # Manual tracking mode with smart detection box visibility:
             # - Show detection boxes when NO object is being tracked (so user can see what to click)
@@ -162,204 +329,29 @@ def draw_detections(
             if not has_active_track:
                 # No tracking yet - show all detection boxes so user can select one
                 for idx in range(num_detections):
-                    color = tuple(id_to_color(classes[idx]).tolist())
+                    color = id_to_color(classes[idx])
                     draw_detection(
                         img_out, boxes[idx], labels[classes[idx]], scores[idx] * 100.0, color
                     )
 
-            # Draw the selected tracked object with tracking ID
-            for track in online_targets:
-                tlwh = track.tlwh
-                track_id = track.track_id
-
-                # Convert from tlwh to xyxy
-                raw_bbox = [tlwh[0], tlwh[1], tlwh[0] + tlwh[2], tlwh[1] + tlwh[3]]
-
-                # Apply smoothing to reduce flickering
-                xmin, ymin, xmax, ymax = _bbox_smoother.smooth(track_id, raw_bbox)
-
-                # Calculate center point
-                center_x = int((xmin + xmax) / 2)
-                center_y = int((ymin + ymax) / 2)
-                tracked_center_point = (center_x, center_y)
-
-                # Use green color for selected object
-                color = (0, 255, 0)  # Green
-
-                # Find the class label for this track
-                label = "tracked"
-                score = 0.0
-                for idx in range(num_detections):
-                    det_box = boxes[idx]
-                    if abs(det_box[0] - xmin) < 10 and abs(det_box[1] - ymin) < 10:
-                        label = labels[classes[idx]]
-                        score = scores[idx] * 100.0
-                        break
-
-                # Print center point coordinates to console
-                print(f"[VISUALIZE_DEBUG] [TRACKING] ID{track_id} ({label}): Center point = ({center_x}, {center_y})")
-
-                # Draw the selected track with thicker border
-                cv2.rectangle(img_out, (xmin, ymin), (xmax, ymax), color, 4)
-
-                # Draw center point marker (crosshair)
-                cv2.drawMarker(img_out, (center_x, center_y), color,
-                              markerType=cv2.MARKER_CROSS, markerSize=20, thickness=3)
-
-                # Draw center point circle
-                cv2.circle(img_out, (center_x, center_y), 5, color, -1)
-
-                font = cv2.FONT_HERSHEY_SIMPLEX
-
-                text = f"TRACKING ID{track_id}: {label} {score:.1f}%"
-                text_color = (255, 255, 255)  # White
-                border_color = (0, 0, 0)  # Black
-
-                # Larger text for selected object
-                cv2.putText(
-                    img_out,
-                    text,
-                    (xmin + 4, ymin + 25),
-                    font,
-                    0.6,
-                    border_color,
-                    3,
-                    cv2.LINE_AA,
-                )
-                cv2.putText(
-                    img_out,
-                    text,
-                    (xmin + 4, ymin + 25),
-                    font,
-                    0.6,
-                    text_color,
-                    2,
-                    cv2.LINE_AA,
-                )
-
-                # Display center coordinates on frame
-                coord_text = f"({center_x}, {center_y})"
-                cv2.putText(
-                    img_out,
-                    coord_text,
-                    (center_x + 10, center_y - 10),
-                    font,
-                    0.5,
-                    border_color,
-                    3,
-                    cv2.LINE_AA,
-                )
-                cv2.putText(
-                    img_out,
-                    coord_text,
-                    (center_x + 10, center_y - 10),
-                    font,
-                    0.5,
-                    text_color,
-                    2,
-                    cv2.LINE_AA,
-                )
+            style = _MANUAL_STYLE
         else:
             # Auto tracking mode: draw all tracked objects
-            for track in online_targets:
-                tlwh = track.tlwh
-                track_id = track.track_id
-
-                # Convert from tlwh (top-left, width, height) to xyxy (xmin, ymin, xmax, ymax)
-                raw_bbox = [tlwh[0], tlwh[1], tlwh[0] + tlwh[2], tlwh[1] + tlwh[3]]
-
-                # Apply smoothing to reduce flickering
-                xmin, ymin, xmax, ymax = _bbox_smoother.smooth(track_id, raw_bbox)
-                box = [xmin, ymin, xmax, ymax]
-
-                # Calculate center point
-                center_x = int((xmin + xmax) / 2)
-                center_y = int((ymin + ymax) / 2)
-                # In auto mode, we just take the last one or none? 
-                # For now let's not auto-gimbal in multi-object auto mode unless specified.
-                # But to be safe if someone wants to use it:
-                tracked_center_point = (center_x, center_y)
-
-                # Use track_id for color to maintain consistent colors
-                color = tuple(id_to_color(track_id).tolist())
-
-                # Find the class label for this track (match with detection)
-                label = "tracked"
-                score = 0.0
-                for idx in range(num_detections):
-                    det_box = boxes[idx]
-                    # Simple IoU check to match track with detection
-                    if abs(det_box[0] - xmin) < 10 and abs(det_box[1] - ymin) < 10:
-                        label = labels[classes[idx]]
-                        score = scores[idx] * 100.0
-                        break
-
-                # Print center point coordinates to console
-                print(f"[VISUALIZE_DEBUG] [TRACKING] ID{track_id} ({label}): Center point = ({center_x}, {center_y})")
-
-                # Draw the track
-                cv2.rectangle(img_out, (xmin, ymin), (xmax, ymax), color, 2)
-
-                # Draw center point marker (crosshair)
-                cv2.drawMarker(img_out, (center_x, center_y), color,
-                              markerType=cv2.MARKER_CROSS, markerSize=15, thickness=2)
-
-                # Draw center point circle
-                cv2.circle(img_out, (center_x, center_y), 4, color, -1)
-
-                font = cv2.FONT_HERSHEY_SIMPLEX
-
-                text = f"ID{track_id}: {label} {score:.1f}%"
-                text_color = (255, 255, 255)  # White
-                border_color = (0, 0, 0)  # Black
-
-                cv2.putText(
-                    img_out,
-                    text,
-                    (xmin + 4, ymin + 20),
-                    font,
-                    0.5,
-                    border_color,
-                    2,
-                    cv2.LINE_AA,
-                )
-                cv2.putText(
-                    img_out,
-                    text,
-                    (xmin + 4, ymin + 20),
-                    font,
-                    0.5,
-                    text_color,
-                    1,
-                    cv2.LINE_AA,
-                )
-
-                # Display center coordinates on frame
-                coord_text = f"({center_x}, {center_y})"
-                cv2.putText(
-                    img_out,
-                    coord_text,
-                    (center_x + 8, center_y - 8),
-                    font,
-                    0.4,
-                    border_color,
-                    2,
-                    cv2.LINE_AA,
-                )
-                cv2.putText(
-                    img_out,
-                    coord_text,
-                    (center_x + 8, center_y - 8),
-                    font,
-                    0.4,
-                    text_color,
-                    1,
-                    cv2.LINE_AA,
-                )
+            style = _AUTO_STYLE
+
+        for track, box, center in zip(online_targets, track_boxes, track_centers):
+            # Manual mode has at most the selected track. Auto mode ends up with the
+            # last one, which nothing auto-gimbals on in multi-object mode yet.
+            tracked_center_point = _draw_track(
+                img_out, track, box, center, det_tl, fresh_tracks,
+                classes, scores, labels, style,
+            )
+
+        _bbox_smoother.tick()
     else:
         # No tracking - draw raw detections
         for idx in range(num_detections):
-            color = tuple(id_to_color(classes[idx]).tolist())
+            color = id_to_color(classes[idx])
             draw_detection(
                 img_out, boxes[idx], labels[classes[idx]], scores[idx] * 100.0, color
             )
@@ -369,6 +361,16 @@ def draw_detections(
     return img_out, tracked_center_point
 
 
+def _writer_worker(write_q: queue.Queue) -> None:
+    """Run queued (write_fn, frame) jobs until the None sentinel."""
+    while True:
+        job = write_q.get()
+        if job is None:
+            break
+        write_fn, frame = job
+        write_fn(frame)
+
+
 def visualize(
     output_queue: queue.Queue,
     cap: Optional[cv2.VideoCapture],
@@ -402,20 +404,19 @@ def visualize(
         if event == cv2.EVENT_MOUSEMOVE:
             # Update coordinates
             param['mouse_pos'] = (x, y)
-            # Print every 30th move to confirm callback is working
-            mouse_move_count[0] += 1
-            if mouse_move_count[0] % 30 == 0:
-                print(f"[VISUALIZE_DEBUG] Callback working - position: ({x}, {y})")
+            # Log every 30th move to confirm callback is working
+            if logger.isEnabledFor(logging.DEBUG):
+                mouse_move_count[0] += 1
+                if mouse_move_count[0] % 30 == 0:
+                    logger.debug("Callback working - position: (%d, %d)", x, y)
         elif event == cv2.EVENT_LBUTTONDOWN:
-            print(f"\n{'='*60}")
-            print(f"[VISUALIZE_DEBUG] [Mouse] LEFT CLICK detected at window coordinates: ({x}, {y})")
-            print(f"{'='*60}")
+            logger.debug("[Mouse] LEFT CLICK detected at window coordinates: (%d, %d)", x, y)
             if manual_tracker is not None:
                 manual_tracker.on_mouse_click(x, y)
             else:
                 print("[Mouse] ERROR: manual_tracker is None!")
         elif event == cv2.EVENT_RBUTTONDOWN:
-            print(f"\n[VISUALIZE_DEBUG] [Mouse] RIGHT CLICK at ({x}, {y}) - Deselecting")
+            logger.debug("[Mouse] RIGHT CLICK at (%d, %d) - Deselecting", x, y)
             if manual_tracker is not None:
                 manual_tracker.deselect()
             else:
@@ -441,7 +442,7 @@ def visualize(
             # If we switch to non-debug, we might need streaming queue, but we removed it.
             # So just continue without display.
         # Set mouse callback for manual tracking
-        print(f"[VISUALIZE_DEBUG] MANUAL TRACKER INSTANCE: {manual_tracker}")
+        logger.debug("MANUAL TRACKER INSTANCE: %s", manual_tracker)
         if manual_tracker is not None:
             cv2.setMouseCallback("Object Detection", mouse_callback, mouse_state)
             print("\n" + "="*60)
@@ -468,6 +469,17 @@ def visualize(
             (frame_width, frame_height),
         )
 
+    # Encoding/saving runs on its own thread so it overlaps drawing the next frame;
+    # the tracker and display state stay on this thread
+    write_q = queue.Queue(maxsize=2)
+    writer_thread = threading.Thread(
+        target=_writer_worker, args=(write_q,), name="visualize-writer", daemon=True
+    )
+    writer_thread.start()
+
+    # A headless live run that saves nothing has no consumer for the rendered frame
+    need_bgr = cap is None or debug or (save_output and out is not None)
+
     # Main visualization loop
     while True:
         result = output_queue.get()
@@ -480,9 +492,19 @@ def visualize(
         if isinstance(inference_result, list) and len(inference_result) == 1:
             inference_result = inference_result[0]
 
+        # Always run the callback: it also drives the tracker
         frame_with_detections = callback(original_frame, inference_result)
 
-        bgr_frame = cv2.cvtColor(frame_with_detections, cv2.COLOR_RGB2BGR)
+        if not need_bgr:
+            image_id += 1
+            output_queue.task_done()
+            continue
+
+        # Swap channels in place: the annotated frame isn't used again after this,
+        # so there's no need for a second full-frame buffer
+        bgr_frame = cv2.cvtColor(
+            frame_with_detections, cv2.COLOR_RGB2BGR, dst=frame_with_detections
+        )
 
         # Add manual tracking UI indicators
         if cap is not None and debug and manual_tracker is not None:
@@ -521,10 +543,15 @@ def visualize(
                 #        pass
 
             if save_output and out is not None:
-                out.write(bgr_frame)
+                try:
+                    # Live video: drop the frame rather than stall drawing on encode
+                    write_q.put_nowait((out.write, bgr_frame))
+                except queue.Full:
+                    pass
         else:
             output_path = os.path.join(output_dir, f"output_{image_id}.jpg")
-            cv2.imwrite(output_path, bgr_frame)
+            # Every image must be written, so wait for the writer here
+            write_q.put((partial(cv2.imwrite, output_path), bgr_frame))
 
         image_id += 1
         output_queue.task_done()
@@ -533,6 +560,10 @@ def visualize(
         if debug and cv2.waitKey(1) & 0xFF == ord("q"):
             break
 
+    # Let the writer finish what's queued before releasing the video file
+    write_q.put(None)
+    writer_thread.join()
+
     if cap is not None and save_output and out is not None:
         out.release()
 
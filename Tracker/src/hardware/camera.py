@@ -2,6 +2,7 @@ import cv2
 import threading
 import time
 from src.core.config import cfg
+from src.hardware.gstreamer import open_h265_capture
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -19,23 +20,27 @@ class Camera:
         
         self.frame = None
         self.ret = False
+        # Incremented per captured frame; frame_condition is notified on each one
+        self.frame_id = 0
+        self.frame_condition = threading.Condition(self.lock)
         
         self._connected = False
 
     def connect(self):
         url = cfg.get("camera.url")
-        # Optimized pipeline for low latency
-        # Note: This is specific to the setup provided in track_and_center.py
-        # We might need to adjust this based on actual hardware
+        width = cfg.get("camera.width", 1280)
+        height = cfg.get("camera.height", 720)
+        # Optimized pipeline for low latency; camera.decoder picks the H.265
+        # decoder element, "auto" probes the hardware ones before avdec_h265
         if "rtsp" in str(url):
-             gst_pipeline = (
-                f"rtspsrc location={url} latency={cfg.get('camera.latency', 0)} ! "
-                "rtph265depay ! h265parse ! avdec_h265 ! videoconvert ! appsink drop=true max-buffers=1"
+             self.cap, _ = open_h265_capture(
+                url,
+                decoder=cfg.get("camera.decoder", "auto"),
+                latency=cfg.get("camera.latency", 0),
+                size=(width, height),
             )
-             logger.info(f"Attempting GStreamer pipeline: {gst_pipeline}")
-             self.cap = cv2.VideoCapture(gst_pipeline, cv2.CAP_GSTREAMER)
              
-             if not self.cap.isOpened():
+             if self.cap is None:
                 logger.warning("GStreamer failed, falling back to default backend...")
                 self.cap = cv2.VideoCapture(url)
         else:
@@ -45,6 +50,14 @@ class Camera:
             logger.error("Failed to open video stream")
             return False
 
+        # Ask the backend for the configured size so the loop doesn't resize every frame.
+        # GStreamer ignores this (videoscale above handles it); files keep their own size.
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        actual = (int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        if actual != (width, height):
+            logger.warning(f"Camera delivers {actual[0]}x{actual[1]}, expected {width}x{height}; stream output will be resized")
+
         self._connected = True
         return True
 
@@ -65,16 +78,33 @@ class Camera:
         return True
 
     def _update(self):
+        # cap.read() blocks until the next frame, so no yield is needed between reads
         while self.running and self.cap.isOpened():
             ret, frame = self.cap.read()
-            with self.lock:
+            with self.frame_condition:
                 self.ret = ret
                 self.frame = frame
-            time.sleep(0.001) # Low CPU usage yield
+                self.frame_id += 1
+                self.frame_condition.notify_all()
+            if not ret:
+                time.sleep(0.01) # Stream hiccup: don't spin on failed reads
 
     def read(self):
+        # No copy: cap.read() allocates a fresh array per capture and _update only
+        # swaps the reference, so the lock is held just long enough to fetch it.
+        # Callers that draw on the frame share it with any other reader of it.
         with self.lock:
-            return self.ret, self.frame.copy() if self.frame is not None else None
+            return self.ret, self.frame
+
+    def wait_for_frame(self, last_id, timeout=0.033):
+        """
+        Block until a frame newer than last_id is captured or timeout expires.
+        Returns (ret, frame, frame_id); frame_id equals last_id on timeout.
+        """
+        with self.frame_condition:
+            if not self.frame_condition.wait_for(lambda: self.frame_id != last_id, timeout):
+                return False, None, last_id
+            return self.ret, self.frame, self.frame_id
 
     def stop(self):
         self.running = False
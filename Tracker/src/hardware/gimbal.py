@@ -27,6 +27,10 @@ class GimbalController:
         self.deadzone = cfg.get("gimbal.deadzone", 20)
         self.move_interval = cfg.get("gimbal.move_interval", 0.05)
         self.last_move_time = 0
+        # False only after update_tracking has sent a stop from inside the deadzone.
+        # Starts True (the gimbal may still be slewing from before we connected) and
+        # is set again by anything that rotates it, so a centred target always stops it
+        self._moving = True
         
         self.connected = False
 
@@ -52,6 +56,20 @@ class GimbalController:
         error_y: target_y - center_y
         """
         if not self.connected: return
+
+        # Both axes inside the deadzone: nothing to compute, and once the stop is
+        # sent there is nothing to send either
+        if abs(error_x) <= self.deadzone and abs(error_y) <= self.deadzone:
+            if self._moving:
+                self.pid_yaw.reset()
+                self.pid_pitch.reset()
+                now = time.monotonic()
+                if now - self.last_move_time > self.move_interval:
+                    self.stop()
+                    self.last_move_time = now
+                    self._moving = False
+            return 0, 0
+        self._moving = True
         
         # Yaw Control
         yaw_speed = 0
@@ -70,11 +88,11 @@ class GimbalController:
             self.pid_pitch.reset()
 
         # Send command periodically
-        now = time.time()
+        now = time.monotonic()
         if now - self.last_move_time > self.move_interval:
             if yaw_speed != 0 or pitch_speed != 0:
                 self.sdk.rotate_gimbal(yaw_speed, pitch_speed)
-                logger.debug(f"Gimbal Move: Yaw={yaw_speed}, Pitch={pitch_speed}")
+                logger.debug("Gimbal Move: Yaw=%s, Pitch=%s", yaw_speed, pitch_speed)
             else:
                 self.stop()
             self.last_move_time = now
@@ -111,7 +129,9 @@ class GimbalController:
         Manually rotate gimbal with specific speeds (-100 to 100)
         """
         if not self.connected: return False
-        return self.sdk.rotate_gimbal(yaw_speed, pitch_speed)
+        self._moving = True
+        # API clients can send bursts of moves; coalesce them, newest speed wins
+        return self.sdk.gimbal.rotate_rate_limited(yaw_speed, pitch_speed)
         
     def stop_gimbal(self):
         """
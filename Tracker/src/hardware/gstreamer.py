@@ -0,0 +1,48 @@
+import cv2
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# H.265 decoders in probe order: Jetson, Raspberry Pi, Intel VA-API, software
+H265_DECODERS = ("nvv4l2decoder", "v4l2h265dec", "vaapih265dec", "avdec_h265")
+
+def h265_pipeline(url, decoder, latency=0, fmt="BGR", size=None):
+    """
+    RTSP H.265 -> appsink pipeline string.
+
+    fmt: appsink pixel format (BGR, or NV12/I420 to leave colour conversion
+    to the caller). size: optional (width, height) to scale to.
+    """
+    stages = [f"rtspsrc location={url} latency={latency}", "rtph265depay", "h265parse", decoder]
+    if decoder == "nvv4l2decoder":
+        # Copy out of NVMM; nvvidconv has no packed 24-bit BGR output
+        stages.append(f"nvvidconv ! video/x-raw,format={'BGRx' if fmt == 'BGR' else fmt}")
+    # Passthrough when the decoder already produces fmt
+    stages.append("videoconvert")
+    caps = f"video/x-raw,format={fmt}"
+    if size:
+        stages.append("videoscale")
+        caps += f",width={size[0]},height={size[1]}"
+    stages.append(caps)
+    stages.append("appsink drop=true max-buffers=1 sync=false")
+    return " ! ".join(stages)
+
+def open_h265_capture(url, decoder="auto", latency=0, fmt="BGR", size=None):
+    """
+    Open an RTSP H.265 stream through GStreamer.
+
+    decoder: element name, or "auto" to try H265_DECODERS in order. A missing
+    element fails at pipeline parse, so probing the unavailable ones is fast.
+
+    Returns (cap, decoder) for the first pipeline that opens, or (None, None).
+    """
+    candidates = H265_DECODERS if decoder == "auto" else (decoder,)
+    for name in candidates:
+        pipeline = h265_pipeline(url, name, latency, fmt, size)
+        logger.info(f"Attempting GStreamer pipeline: {pipeline}")
+        cap = cv2.VideoCapture(pipeline, cv2.CAP_GSTREAMER)
+        if cap.isOpened():
+            logger.info(f"Decoding H.265 with {name}")
+            return cap, name
+        cap.release()
+    return None, None
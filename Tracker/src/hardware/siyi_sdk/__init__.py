@@ -5,11 +5,14 @@ Unified SDK for SIYI gimbal camera control.
 Combines all modules into a single easy-to-use interface.
 """
 
+from typing import Callable, Optional
+
 from .siyi_connection import SIYIConnection
 from .siyi_camera_info import SIYICameraInfo
-from .siyi_gimbal import SIYIGimbal
+from .siyi_gimbal import SIYIGimbal, Attitude
 from .siyi_zoom import SIYIZoom
 from .siyi_capture import SIYICapture
+from .siyi_protocol import Commands
 
 
 class SIYISDK:
@@ -32,7 +35,9 @@ class SIYISDK:
             host: Camera IP address (default: 192.168.144.25)
             port: Camera TCP port (default: 37260)
         """
-        self.connection = SIYIConnection(host, port)
+        # Shared with any other SIYISDK for the same camera
+        self.connection = SIYIConnection.acquire(host, port)
+        self._holds_connection = True
         self.camera_info = SIYICameraInfo(self.connection)
         self.gimbal = SIYIGimbal(self.connection)
         self.zoom = SIYIZoom(self.connection)
@@ -47,18 +52,39 @@ class SIYISDK:
         Returns:
             True if connection successful
         """
+        if not self._holds_connection:
+            # Reconnecting after disconnect(): take our reference back
+            SIYIConnection.acquire(self.connection.host, self.connection.port)
+            self._holds_connection = True
         self._connected = self.connection.connect()
         return self._connected
     
     def disconnect(self):
-        """Disconnect from the camera"""
-        self.connection.disconnect()
+        """Disconnect from the camera (it stays up while other SDK instances use it)"""
+        if self._holds_connection:
+            self._holds_connection = False
+            self.connection.release()
         self._connected = False
     
     def is_connected(self) -> bool:
         """Check if connected to camera"""
         return self._connected and self.connection.connected
     
+    def _send(self, cmd_id: int, send: Callable[[], bool], wait: bool, timeout: float) -> bool:
+        """
+        Run a command; with wait, also block until the camera acknowledges it
+        
+        Returns:
+            True if sent (and, with wait, acknowledged within timeout)
+        """
+        if not wait:
+            return send()
+        ack = self.connection.expect(cmd_id)
+        if not send():
+            ack.cancel()
+            return False
+        return self.connection.wait_reply(ack, timeout) is not None
+    
     # Camera Info Methods
     def get_hardware_id(self) -> str:
         """Get camera hardware ID"""
@@ -69,29 +95,36 @@ class SIYISDK:
         return self.camera_info.get_firmware_version()
     
     # Gimbal Control Methods
-    def center_gimbal(self) -> bool:
-        """Center the gimbal"""
-        return self.gimbal.center()
+    def center_gimbal(self, wait: bool = False, timeout: float = 2.0) -> bool:
+        """Center the gimbal (wait: block until the camera acknowledges)"""
+        return self._send(Commands.CENTER, self.gimbal.center, wait, timeout)
     
-    def rotate_gimbal(self, yaw: int, pitch: int) -> bool:
+    def rotate_gimbal(self, yaw: int, pitch: int, wait: bool = False, timeout: float = 2.0) -> bool:
         """
         Rotate gimbal with speed values
         
         Args:
             yaw: Yaw speed (-100 to 100)
             pitch: Pitch speed (-100 to 100)
+            wait: Block until the camera acknowledges
+            timeout: Acknowledgment timeout in seconds
         """
-        return self.gimbal.rotate(yaw, pitch)
+        return self._send(Commands.GIMBAL_ROTATION, lambda: self.gimbal.rotate(yaw, pitch),
+                          wait, timeout)
     
-    def set_gimbal_angle(self, yaw: float, pitch: float) -> bool:
+    def set_gimbal_angle(self, yaw: float, pitch: float, wait: bool = False,
+                         timeout: float = 2.0) -> bool:
         """
         Set absolute gimbal angles
         
         Args:
             yaw: Yaw angle in degrees (-135 to 135)
             pitch: Pitch angle in degrees (-90 to 25)
+            wait: Block until the camera acknowledges
+            timeout: Acknowledgment timeout in seconds
         """
-        return self.gimbal.control_angle(yaw, pitch)
+        return self._send(Commands.CONTROL_ANGLE, lambda: self.gimbal.control_angle(yaw, pitch),
+                          wait, timeout)
     
     def set_lock_mode(self) -> bool:
         """Set gimbal to Lock mode"""
@@ -113,18 +146,22 @@ class SIYISDK:
         """Get gimbal attitude (yaw, pitch, roll)"""
         return self.gimbal.get_attitude()
     
+    def get_gimbal_attitude_raw(self) -> Optional[Attitude]:
+        """Get gimbal attitude in tenths of a degree (None if failed)"""
+        return self.gimbal.get_attitude_raw()
+    
     def get_working_mode(self) -> str:
         """Get current gimbal working mode"""
         return self.gimbal.get_working_mode()
     
     # Zoom Control Methods
-    def zoom_in(self) -> bool:
-        """Zoom in by one step"""
-        return self.zoom.zoom_in()
+    def zoom_in(self, wait: bool = False, timeout: float = 2.0) -> bool:
+        """Zoom in by one step (wait: block until the camera acknowledges)"""
+        return self._send(Commands.MANUAL_ZOOM, self.zoom.zoom_in, wait, timeout)
     
-    def zoom_out(self) -> bool:
-        """Zoom out by one step"""
-        return self.zoom.zoom_out()
+    def zoom_out(self, wait: bool = False, timeout: float = 2.0) -> bool:
+        """Zoom out by one step (wait: block until the camera acknowledges)"""
+        return self._send(Commands.MANUAL_ZOOM, self.zoom.zoom_out, wait, timeout)
     
     def manual_zoom_in(self) -> bool:
         """Manual zoom in"""
@@ -134,14 +171,17 @@ class SIYISDK:
         """Manual zoom out"""
         return self.zoom.manual_zoom_out()
     
-    def set_zoom(self, zoom_level: float) -> bool:
+    def set_zoom(self, zoom_level: float, wait: bool = False, timeout: float = 2.0) -> bool:
         """
         Set absolute zoom level
         
         Args:
             zoom_level: Zoom multiplier (e.g., 1.0, 4.5, 10.0)
+            wait: Block until the camera acknowledges
+            timeout: Acknowledgment timeout in seconds
         """
-        return self.zoom.set_absolute_zoom(zoom_level)
+        return self._send(Commands.ABSOLUTE_ZOOM, lambda: self.zoom.set_absolute_zoom(zoom_level),
+                          wait, timeout)
     
     def get_max_zoom(self) -> float:
         """Get maximum zoom value"""
@@ -160,9 +200,9 @@ class SIYISDK:
         """Start/stop video recording"""
         return self.capture.record_video()
     
-    def auto_focus(self) -> bool:
-        """Trigger auto focus"""
-        return self.capture.auto_focus()
+    def auto_focus(self, wait: bool = False, timeout: float = 2.0) -> bool:
+        """Trigger auto focus (wait: block until the camera acknowledges)"""
+        return self._send(Commands.AUTO_FOCUS, self.capture.auto_focus, wait, timeout)
     
     def __enter__(self):
         """Context manager entry"""
@@ -191,37 +231,31 @@ if __name__ == "__main__":
             print("--- Camera Information ---")
             hw_id = sdk.get_hardware_id()
             fw_ver = sdk.get_firmware_version()
-            time.sleep(1)
             
             # Gimbal control
             print("\n--- Gimbal Control ---")
-            sdk.center_gimbal()
-            time.sleep(2)
+            sdk.center_gimbal(wait=True)
             
-            sdk.rotate_gimbal(50, 30)
-            time.sleep(2)
+            sdk.rotate_gimbal(50, 30, wait=True)
+            time.sleep(2)  # Rotate for 2 seconds
             
-            sdk.center_gimbal()
-            time.sleep(2)
+            sdk.center_gimbal(wait=True)
             
             # Zoom control
             print("\n--- Zoom Control ---")
             current_zoom = sdk.get_current_zoom()
-            time.sleep(1)
             
-            sdk.zoom_in()
-            time.sleep(1)
+            sdk.zoom_in(wait=True)
+            time.sleep(1)  # Zoom in for 1 second
             
-            sdk.zoom_out()
-            time.sleep(1)
+            sdk.zoom_out(wait=True)
+            time.sleep(1)  # Zoom out for 1 second
             
             # Capture
             print("\n--- Capture ---")
-            sdk.auto_focus()
-            time.sleep(1)
+            sdk.auto_focus(wait=True)
             
             sdk.take_picture()
-            time.sleep(1)
             
             print("\n" + "=" * 60)
             print("✓ Demo complete")
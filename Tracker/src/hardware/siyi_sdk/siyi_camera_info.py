@@ -8,7 +8,9 @@ Handles camera information retrieval:
 
 from .siyi_connection import SIYIConnection
 from .siyi_protocol import Commands
-import time
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 
 class SIYICameraInfo:
@@ -33,24 +35,22 @@ class SIYICameraInfo:
         Returns:
             Hardware ID string or empty string if failed
         """
-        print("\n→ Requesting Hardware ID...")
+        logger.debug("Requesting Hardware ID...")
         
         # Send request
-        if not self.connection.send_packet(Commands.HARDWARE_ID, b'', need_ack=True):
+        reply = self.connection.send_request(Commands.HARDWARE_ID)
+        if reply is None:
             return ""
         
         # Wait for response
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            response = self.connection.receive_packet(timeout=0.5)
-            if response and response['cmd_id'] == Commands.HARDWARE_ID:
-                # Parse hardware ID from response data
-                hw_id = response['data'].decode('utf-8', errors='ignore').strip('\x00')
-                print(f"✓ Hardware ID: {hw_id}")
-                return hw_id
-            time.sleep(0.1)
+        response = self.connection.wait_reply(reply, timeout)
+        if response:
+            # Parse hardware ID from response data
+            hw_id = response['data'].decode('utf-8', errors='ignore').strip('\x00')
+            logger.info(f"Hardware ID: {hw_id}")
+            return hw_id
         
-        print("✗ No response received")
+        logger.warning("No hardware ID response received")
         return ""
     
     def get_firmware_version(self, timeout: float = 2.0) -> str:
@@ -63,33 +63,31 @@ class SIYICameraInfo:
         Returns:
             Firmware version string or empty string if failed
         """
-        print("\n→ Requesting Firmware Version...")
+        logger.debug("Requesting Firmware Version...")
         
         # Send request
-        if not self.connection.send_packet(Commands.FIRMWARE_VERSION, b'', need_ack=True):
+        reply = self.connection.send_request(Commands.FIRMWARE_VERSION)
+        if reply is None:
             return ""
         
         # Wait for response
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            response = self.connection.receive_packet(timeout=0.5)
-            if response and response['cmd_id'] == Commands.FIRMWARE_VERSION:
-                # Parse firmware version from response data
-                # Typically format: major.minor.patch
-                if len(response['data']) >= 3:
-                    major = response['data'][0]
-                    minor = response['data'][1]
-                    patch = response['data'][2]
-                    version = f"{major}.{minor}.{patch}"
-                    print(f"✓ Firmware Version: {version}")
-                    return version
-                else:
-                    fw_ver = response['data'].hex()
-                    print(f"✓ Firmware Version (raw): {fw_ver}")
-                    return fw_ver
-            time.sleep(0.1)
+        response = self.connection.wait_reply(reply, timeout)
+        if response:
+            # Parse firmware version from response data
+            # Typically format: major.minor.patch
+            if len(response['data']) >= 3:
+                major = response['data'][0]
+                minor = response['data'][1]
+                patch = response['data'][2]
+                version = f"{major}.{minor}.{patch}"
+                logger.info(f"Firmware Version: {version}")
+                return version
+            else:
+                fw_ver = response['data'].hex()
+                logger.info(f"Firmware Version (raw): {fw_ver}")
+                return fw_ver
         
-        print("✗ No response received")
+        logger.warning("No firmware version response received")
         return ""
 
 
@@ -110,7 +108,6 @@ if __name__ == "__main__":
         # Get firmware version
         fw_ver = camera_info.get_firmware_version()
         
-        time.sleep(2)
         conn.disconnect()
         
         print("\n" + "=" * 50)
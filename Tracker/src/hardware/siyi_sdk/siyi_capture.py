@@ -8,7 +8,16 @@ Handles photo and video capture:
 """
 
 from .siyi_connection import SIYIConnection
-from .siyi_protocol import Commands
+from .siyi_protocol import SIYIProtocol, Commands
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Capture commands have fixed payloads; build their frames once (seq 0)
+_protocol = SIYIProtocol()
+_FRAME_PICTURE = _protocol.build_packet(Commands.CAPTURE_MODE, b'\x00', seq=0)
+_FRAME_RECORD = _protocol.build_packet(Commands.CAPTURE_MODE, b'\x02', seq=0)
+_FRAME_AUTO_FOCUS = _protocol.build_packet(Commands.AUTO_FOCUS, b'\x01', seq=0)
 
 
 class SIYICapture:
@@ -30,10 +39,10 @@ class SIYICapture:
         Returns:
             True if command sent successfully
         """
-        print("\n→ Taking picture...")
-        result = self.connection.send_packet(Commands.CAPTURE_MODE, b'\x00')
+        logger.debug("Taking picture...")
+        result = self.connection._send_raw(_FRAME_PICTURE)
         if result:
-            print("✓ Picture capture command sent")
+            logger.info("Picture capture command sent")
         return result
     
     def record_video(self) -> bool:
@@ -43,10 +52,10 @@ class SIYICapture:
         Returns:
             True if command sent successfully
         """
-        print("\n→ Toggling video recording...")
-        result = self.connection.send_packet(Commands.CAPTURE_MODE, b'\x02')
+        logger.debug("Toggling video recording...")
+        result = self.connection._send_raw(_FRAME_RECORD)
         if result:
-            print("✓ Video recording command sent")
+            logger.info("Video recording command sent")
         return result
     
     def auto_focus(self) -> bool:
@@ -56,10 +65,10 @@ class SIYICapture:
         Returns:
             True if command sent successfully
         """
-        print("\n→ Triggering auto focus...")
-        result = self.connection.send_packet(Commands.AUTO_FOCUS, b'\x01')
+        logger.debug("Triggering auto focus...")
+        result = self.connection._send_raw(_FRAME_AUTO_FOCUS)
         if result:
-            print("✓ Auto focus command sent")
+            logger.info("Auto focus command sent")
         return result
 
 
@@ -77,8 +86,9 @@ if __name__ == "__main__":
         capture = SIYICapture(conn)
         
         # Test auto focus
-        capture.auto_focus()
-        time.sleep(2)
+        ack = conn.expect(Commands.AUTO_FOCUS)
+        if capture.auto_focus():
+            conn.wait_reply(ack, 2.0)
         
         # Test take picture
         capture.take_picture()
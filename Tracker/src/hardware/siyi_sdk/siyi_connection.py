@@ -3,21 +3,41 @@ SIYI SDK Connection Manager
 
 Handles TCP connection to SIYI camera/gimbal:
 - TCP client connection
-- Heartbeat management
+- Heartbeat management (sent from the receive thread)
 - Send/receive packet handling
 - Auto-reconnect support
 """
 
+import logging
+import queue
+import select
+import selectors
 import socket
 import threading
 import time
-from typing import Optional, Callable
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Deque, Dict, Optional, Callable, Tuple
 from .siyi_protocol import SIYIProtocol, Commands
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+# Per-packet hex dumps. Off unless this logger is set to DEBUG, so the hex
+# strings aren't built for every packet.
+wire_logger = logging.getLogger(__name__ + ".wire")
+wire_logger.setLevel(logging.INFO)
 
 
 class SIYIConnection:
     """Manages TCP connection to SIYI camera/gimbal"""
     
+    # Shared connections by (host, port), see acquire()
+    _pool: Dict[Tuple[str, int], "SIYIConnection"] = {}
+    _pool_lock = threading.Lock()
+    
+    # Longest a send waits for room in a full socket buffer
+    SEND_TIMEOUT = 1.0
+    
     def __init__(self, host: str = "192.168.144.25", port: int = 37260):
         """
         Initialize connection manager
@@ -30,48 +50,134 @@ class SIYIConnection:
         self.port = port
         self.protocol = SIYIProtocol()
         self.socket: Optional[socket.socket] = None
+        # Read readiness for the socket, registered once per connection
+        self._sel: Optional[selectors.BaseSelector] = None
         self.connected = False
         
-        # Heartbeat management
+        # Heartbeat management (the receive thread sends it while this is set)
         self.heartbeat_interval = 1.0  # seconds
-        self.heartbeat_thread: Optional[threading.Thread] = None
         self.heartbeat_running = False
+        # The heartbeat never changes, so it is serialized (header + CRC) once
+        self._heartbeat_frame = self.protocol.build_packet(Commands.HEARTBEAT, b'\x00')
+        
+        # Receive buffer, allocated once and filled with recv_into(). It holds
+        # a partial packet until the rest of it arrives.
+        self._rx_buf = bytearray(4096)
+        self._rx_view = memoryview(self._rx_buf)
+        self._rx_len = 0
+        
+        # Parsed packets per command ID, filled only by the receive thread
+        self._inbox: Dict[int, queue.Queue] = {}
+        # Futures from send_request() waiting for a reply, oldest first per command ID
+        self._waiters: Dict[int, Deque[Future]] = {}
+        self._waiters_lock = threading.Lock()
         
         # Response callback
         self.response_callback: Optional[Callable] = None
         self.receive_thread: Optional[threading.Thread] = None
         self.receive_running = False
         
+        # acquire() references; connect() is serialized for shared users
+        self._refs = 0
+        self._connect_lock = threading.Lock()
+        self._send_lock = threading.Lock()
+    
+    @classmethod
+    def acquire(cls, host: str = "192.168.144.25", port: int = 37260) -> "SIYIConnection":
+        """
+        Get the shared connection for host:port, creating it on first use
+        
+        Every SDK instance for the same camera then shares one TCP session,
+        receive thread and heartbeat. Pair each call with release().
+        
+        Args:
+            host: Camera IP address
+            port: Camera TCP port
+            
+        Returns:
+            The pooled connection (connect() it if it isn't connected yet)
+        """
+        with cls._pool_lock:
+            conn = cls._pool.get((host, port))
+            if conn is None:
+                conn = cls._pool[(host, port)] = cls(host, port)
+            conn._refs += 1
+            return conn
+    
+    def release(self):
+        """Drop an acquire() reference; the last one disconnects"""
+        with self._pool_lock:
+            self._refs -= 1
+            last = self._refs <= 0
+            if last:
+                self._refs = 0
+        if last and self.connected:
+            self.disconnect()
+        
     def connect(self) -> bool:
         """
         Establish TCP connection to camera
         
         Returns:
-            True if connected successfully
+            True if connected successfully (or already connected)
         """
-        try:
-            self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.socket.settimeout(5.0)  # 5 second timeout
-            self.socket.connect((self.host, self.port))
+        with self._connect_lock:
+            if self.connected:
+                return True
+            try:
+                self._open_socket()
+            except Exception as e:
+                logger.error(f"Connection failed: {e}")
+                self.connected = False
+                return False
+            
             self.connected = True
-            print(f"[OK] Connected to {self.host}:{self.port}")
+            logger.info(f"Connected to {self.host}:{self.port}")
+            
+            # Enable heartbeat first so the receive thread sends one straight away
+            self.start_heartbeat()
             
             # Start receive thread
             self._start_receive_thread()
             
-            # Start heartbeat
-            self.start_heartbeat()
-            
             return True
-        except Exception as e:
-            print(f"[ERROR] Connection failed: {e}")
-            self.connected = False
-            return False
     
     def disconnect(self):
         """Close connection and stop heartbeat"""
         self.stop_heartbeat()
         self._stop_receive_thread()
+        self._fail_waiters(ConnectionError("disconnected"))
+        self._close_socket()
+        
+        self.connected = False
+        logger.info("Disconnected")
+    
+    def _open_socket(self):
+        """Create, connect and configure the socket (raises on failure)"""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            sock.settimeout(5.0)  # 5 second timeout
+            sock.connect((self.host, self.port))
+            # Control packets are a few bytes each; don't let Nagle hold them back
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            # Let the kernel notice a dead camera on an otherwise idle link
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            # Receive waits go through the selector instead of a settimeout() per recv
+            sock.setblocking(False)
+            sel = selectors.DefaultSelector()
+            sel.register(sock, selectors.EVENT_READ)
+        except Exception:
+            sock.close()
+            raise
+        self._rx_len = 0
+        self._sel = sel
+        self.socket = sock
+    
+    def _close_socket(self):
+        """Close the selector and socket, if open"""
+        if self._sel:
+            self._sel.close()
+            self._sel = None
         
         if self.socket:
             try:
@@ -79,9 +185,34 @@ class SIYIConnection:
             except:
                 pass
             self.socket = None
+    
+    def _reconnect(self) -> bool:
+        """
+        Reopen the connection from the receive thread, backing off exponentially
+        from 50 ms up to 2 s between attempts. Pending requests fail straight
+        away instead of waiting out their timeouts.
         
-        self.connected = False
-        print("[OK] Disconnected")
+        Returns:
+            True once reconnected, False if the connection was shut down first
+        """
+        self._fail_waiters(ConnectionError("connection lost"))
+        self._close_socket()
+        backoff = 0.05
+        while self.receive_running:
+            time.sleep(backoff)
+            try:
+                self._open_socket()
+            except OSError as e:
+                logger.warning(f"Reconnect to {self.host}:{self.port} failed: {e}")
+                backoff = min(backoff * 2, 2.0)
+                continue
+            if not self.receive_running:
+                # disconnect() ran while we were connecting
+                self._close_socket()
+                return False
+            logger.info(f"Reconnected to {self.host}:{self.port}")
+            return True
+        return False
     
     def send_packet(self, cmd_id: int, data: bytes = b'', need_ack: bool = False) -> bool:
         """
@@ -96,23 +227,184 @@ class SIYIConnection:
             True if sent successfully
         """
         if not self.connected or not self.socket:
-            print("[ERROR] Not connected")
+            logger.error("Not connected")
             return False
         
+        # Header, payload and CRC go out in one sendmsg(), with no concatenation
+        header = self.protocol.build_header(cmd_id, len(data), need_ack)
+        return self._send_raw(header, data, self.protocol.build_crc(header, data))
+    
+    def _send_raw(self, *parts: bytes) -> bool:
+        """
+        Send an already built packet (e.g. a frame cached for a constant command)
+        
+        Args:
+            parts: Complete packet including CRC16, as one buffer or several
+                   gathered into a single write
+            
+        Returns:
+            True if sent successfully
+        """
+        sock = self.socket
+        if not self.connected or not sock:
+            logger.error("Not connected")
+            return False
+        
+        # Held across partial writes so frames from different threads don't interleave
+        with self._send_lock:
+            sent = 0
+            try:
+                try:
+                    sent = sock.sendmsg(parts)
+                except BlockingIOError:
+                    pass  # Send buffer full; wait for room below
+                if sent < sum(map(len, parts)):
+                    self._send_rest(sock, memoryview(b''.join(parts))[sent:])
+            except socket.timeout as e:
+                if not sent:
+                    # Nothing of this frame went out, so the stream is still in sync
+                    logger.error(f"Send failed: {e}")
+                    return False
+                self._shutdown_after_send_error(sock, e)
+                return False
+            except OSError as e:
+                self._shutdown_after_send_error(sock, e)
+                return False
+            except Exception as e:
+                # e.g. the socket was closed by a concurrent reconnect
+                logger.error(f"Send failed: {e}")
+                return False
+        if wire_logger.isEnabledFor(logging.DEBUG):
+            wire_logger.debug(">> Sent: %s", self.protocol.packet_to_hex(b''.join(parts)))
+        return True
+    
+    def _send_rest(self, sock: socket.socket, rest: memoryview):
+        """
+        Finish a short write on the non-blocking socket, waiting for writability
+        
+        Raises socket.timeout if the send buffer stays full for SEND_TIMEOUT.
+        """
+        deadline = time.monotonic() + self.SEND_TIMEOUT
+        while rest:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise socket.timeout("send buffer stayed full")
+            # Plain select: the selector belongs to the receive thread
+            if not select.select((), (sock,), (), remaining)[1]:
+                continue
+            try:
+                rest = rest[sock.send(rest):]
+            except BlockingIOError:
+                continue
+    
+    def _shutdown_after_send_error(self, sock: socket.socket, error: Exception):
+        logger.error(f"Send failed: {error}")
+        # Wake the receive thread (its recv sees EOF) so it reconnects
         try:
-            packet = self.protocol.build_packet(cmd_id, data, need_ack)
-            self.socket.sendall(packet)
-            print(f">> Sent: {self.protocol.packet_to_hex(packet)}")
-            return True
-        except Exception as e:
-            print(f"[ERROR] Send failed: {e}")
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+    
+    def send_request(self, cmd_id: int, data: bytes = b'') -> Optional[Future]:
+        """
+        Send a request (need_ack) and return a Future for its reply
+        
+        The reply is matched by command ID; replies from the camera don't echo
+        the request's sequence number. Requests for different commands can be
+        in flight at the same time, and replies to one command are handed
+        out in request order.
+        
+        Args:
+            cmd_id: Command ID
+            data: Data payload
+            
+        Returns:
+            Future resolving to the parsed reply, or None if sending failed
+        """
+        # Register before sending so a fast reply can't arrive unclaimed
+        reply = self.expect(cmd_id)
+        if not self.send_packet(cmd_id, data, need_ack=True):
+            reply.cancel()
+            return None
+        return reply
+    
+    def expect(self, cmd_id: int) -> Future:
+        """
+        Register for the next packet with the given command ID
+        
+        For commands the camera acknowledges with a packet of the same ID
+        (center, rotate, zoom, ...): call before sending the command, then
+        wait_reply() on the result.
+        
+        Args:
+            cmd_id: Command ID of the expected packet
+            
+        Returns:
+            Future resolving to the parsed packet
+        """
+        reply = Future()
+        with self._waiters_lock:
+            waiters = self._waiters.setdefault(cmd_id, deque())
+            # Drop waiters whose callers already gave up
+            while waiters and waiters[0].cancelled():
+                waiters.popleft()
+            waiters.append(reply)
+        return reply
+    
+    def wait_reply(self, reply: Future, timeout: float) -> Optional[dict]:
+        """
+        Wait for a send_request() reply
+        
+        Args:
+            reply: Future returned by send_request()
+            timeout: Timeout in seconds
+            
+        Returns:
+            Parsed packet dictionary or None on timeout / disconnect
+        """
+        try:
+            return reply.result(timeout=timeout)
+        except FutureTimeout:
+            # Cancelled so _dispatch() skips it if the reply turns up late
+            reply.cancel()
+            return None
+        except ConnectionError:
+            return None
+    
+    def _fail_waiters(self, exc: Exception):
+        """Fail every pending send_request() future with exc"""
+        with self._waiters_lock:
+            waiters, self._waiters = self._waiters, {}
+        for pending in waiters.values():
+            for reply in pending:
+                if reply.set_running_or_notify_cancel():
+                    reply.set_exception(exc)
+    
+    def _resolve_waiter(self, parsed: dict) -> bool:
+        """Hand a packet to the oldest live waiter for its command ID"""
+        waiters = self._waiters.get(parsed['cmd_id'])
+        if not waiters:
             return False
+        with self._waiters_lock:
+            while waiters:
+                reply = waiters.popleft()
+                # False when the caller already timed out and cancelled it
+                if reply.set_running_or_notify_cancel():
+                    reply.set_result(parsed)
+                    return True
+        return False
     
-    def receive_packet(self, timeout: float = 1.0) -> Optional[dict]:
+    def receive_packet(self, cmd_id: int, timeout: float = 1.0) -> Optional[dict]:
         """
-        Receive a packet from the camera
+        Wait for the next packet with the given command ID
+        
+        Only the receive thread reads the socket. It queues every packet under
+        its command ID, so callers waiting on different replies can't take
+        each other's packets. Replies claimed by a send_request() future
+        don't show up here.
         
         Args:
+            cmd_id: Command ID of the expected packet
             timeout: Receive timeout in seconds
             
         Returns:
@@ -122,36 +414,101 @@ class SIYIConnection:
             return None
         
         try:
-            self.socket.settimeout(timeout)
-            data = self.socket.recv(1024)
-            if data:
-                parsed = self.protocol.parse_packet(data)
-                if parsed:
-                    print(f"<< Received: CMD_ID={parsed['cmd_id']:02X}, DATA={parsed['data'].hex()}")
-                return parsed
-        except socket.timeout:
-            return None
-        except Exception as e:
-            print(f"[ERROR] Receive failed: {e}")
+            parsed = self._inbox_for(cmd_id).get(timeout=timeout)
+        except queue.Empty:
             return None
+        return parsed
+    
+    def _inbox_for(self, cmd_id: int) -> queue.Queue:
+        """Packet queue for a command ID, created on first use"""
+        inbox = self._inbox.get(cmd_id)
+        if inbox is None:
+            # setdefault keeps a single queue if both threads get here at once
+            inbox = self._inbox.setdefault(cmd_id, queue.Queue(maxsize=4))
+        return inbox
+    
+    def _dispatch(self, parsed: dict):
+        """
+        Resolve a send_request() future with a received packet, or queue it for
+        receive_packet(), then pass it to the callback
+        """
+        if wire_logger.isEnabledFor(logging.DEBUG):
+            wire_logger.debug("<< Received: CMD_ID=%02X, DATA=%s", parsed['cmd_id'], parsed['data'].hex())
+        if self._resolve_waiter(parsed):
+            if self.response_callback:
+                self.response_callback(parsed)
+            return
+        inbox = self._inbox_for(parsed['cmd_id'])
+        try:
+            inbox.put_nowait(parsed)
+        except queue.Full:
+            # Nobody is reading this command; keep the newest packets
+            try:
+                inbox.get_nowait()
+            except queue.Empty:
+                pass
+            inbox.put_nowait(parsed)
+        if self.response_callback:
+            self.response_callback(parsed)
     
     def _receive_loop(self):
-        """Background thread for receiving packets"""
+        """
+        Background thread for receiving packets and sending the heartbeat.
+        select() sleeps until data arrives or the next heartbeat is due.
+        """
+        next_heartbeat = time.monotonic()
         while self.receive_running and self.connected:
             try:
+                wait = 0.5
+                if self.heartbeat_running:
+                    now = time.monotonic()
+                    if now >= next_heartbeat:
+                        self._send_raw(self._heartbeat_frame)
+                        next_heartbeat = now + self.heartbeat_interval
+                    wait = min(wait, next_heartbeat - now)
                 if self.socket:
-                    self.socket.settimeout(0.5)
-                    data = self.socket.recv(1024)
-                    if data:
-                        parsed = self.protocol.parse_packet(data)
-                        if parsed and self.response_callback:
-                            self.response_callback(parsed)
-            except socket.timeout:
+                    if not self._sel.select(wait):
+                        continue
+                    n = self.socket.recv_into(self._rx_view[self._rx_len:])
+                    if not n:
+                        raise ConnectionError("connection closed by camera")
+                    self._rx_len += n
+                    self._drain_rx()
+            except BlockingIOError:
                 continue
             except Exception as e:
-                if self.receive_running:
-                    print(f"[ERROR] Receive loop error: {e}")
+                if not self.receive_running:
+                    break
+                logger.error(f"Receive loop error: {e}")
+                if not self._reconnect():
+                    break
+    
+    def _drain_rx(self):
+        """Dispatch every complete packet in the receive buffer, keep the remainder"""
+        buf, view, end = self._rx_buf, self._rx_view, self._rx_len
+        off = 0
+        while end - off >= 10:  # Minimum packet size
+            if buf[off] != 0x55 or buf[off + 1] != 0x66:
+                # Not at a packet start; skip to the next STX
+                nxt = buf.find(b'\x55\x66', off + 1, end)
+                off = nxt if nxt >= 0 else end - 1
+                continue
+            size = 10 + (buf[off + 3] | (buf[off + 4] << 8))
+            if size > len(buf):
+                # Bogus length; resync past this STX
+                off += 1
+                continue
+            if end - off < size:
                 break
+            parsed = self.protocol.parse_packet(view[off:off + size])
+            if parsed:
+                self._dispatch(parsed)
+                off += size
+            else:
+                off += 1
+        if off:
+            buf[:end - off] = buf[off:end]
+            self._rx_len = end - off
     
     def _start_receive_thread(self):
         """Start background receive thread"""
@@ -167,27 +524,17 @@ class SIYIConnection:
             self.receive_thread.join(timeout=2.0)
             self.receive_thread = None
     
-    def _heartbeat_loop(self):
-        """Background thread for sending heartbeat packets"""
-        while self.heartbeat_running and self.connected:
-            self.send_packet(Commands.HEARTBEAT, b'\x00')
-            time.sleep(self.heartbeat_interval)
-    
     def start_heartbeat(self):
         """Start sending heartbeat packets"""
         if not self.heartbeat_running:
             self.heartbeat_running = True
-            self.heartbeat_thread = threading.Thread(target=self._heartbeat_loop, daemon=True)
-            self.heartbeat_thread.start()
-            print("[OK] Heartbeat started")
+            logger.info("Heartbeat started")
     
     def stop_heartbeat(self):
         """Stop sending heartbeat packets"""
-        self.heartbeat_running = False
-        if self.heartbeat_thread:
-            self.heartbeat_thread.join(timeout=2.0)
-            self.heartbeat_thread = None
-            print("[OK] Heartbeat stopped")
+        if self.heartbeat_running:
+            self.heartbeat_running = False
+            logger.info("Heartbeat stopped")
     
     def set_response_callback(self, callback: Callable):
         """Set callback function for received packets"""
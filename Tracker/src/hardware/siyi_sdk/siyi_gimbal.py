@@ -10,9 +10,44 @@ Handles gimbal control operations:
 """
 
 from .siyi_connection import SIYIConnection
-from .siyi_protocol import Commands
+from .siyi_protocol import SIYIProtocol, Commands
 import struct
+import threading
 import time
+from typing import NamedTuple, Optional
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Constant commands, serialized (header + CRC) once at import. seq is fixed
+# at 0, as in the SIYI SDK sample frames.
+_protocol = SIYIProtocol()
+_FRAME_CENTER = _protocol.build_packet(Commands.CENTER, b'\x01', seq=0)
+_FRAME_LOCK = _protocol.build_packet(Commands.CAPTURE_MODE, b'\x03', seq=0)
+_FRAME_FOLLOW = _protocol.build_packet(Commands.CAPTURE_MODE, b'\x04', seq=0)
+_FRAME_FPV = _protocol.build_packet(Commands.CAPTURE_MODE, b'\x05', seq=0)
+
+# ATTITUDE_DATA payload: yaw, pitch, roll as int16 tenths of a degree
+_ATTITUDE = struct.Struct('<hhh')
+# GIMBAL_ROTATION payload: yaw, pitch speed as int8
+_ROTATION = struct.Struct('bb')
+# CONTROL_ANGLE payload: yaw, pitch as int16 tenths of a degree
+_ANGLE = struct.Struct('<hh')
+
+
+class Attitude(NamedTuple):
+    """Gimbal attitude as sent by the camera, in tenths of a degree"""
+    yaw: int
+    pitch: int
+    roll: int
+    
+    def degrees(self) -> dict:
+        """Attitude in degrees, as returned by SIYIGimbal.get_attitude()"""
+        return {
+            'yaw': self.yaw / 10.0,
+            'pitch': self.pitch / 10.0,
+            'roll': self.roll / 10.0
+        }
 
 
 class SIYIGimbal:
@@ -26,6 +61,19 @@ class SIYIGimbal:
             connection: Active SIYI connection
         """
         self.connection = connection
+        
+        # rotate_rate_limited() state: the newest speeds held back by the interval
+        self._rotate_lock = threading.Lock()
+        self._last_rotate_t = 0.0
+        self._pending_rotate = None
+        self._rotate_timer = None
+        
+        # rotate() and control_angle() run at control-loop rate; their packets
+        # are preallocated and only payload, seq and CRC are rewritten per send
+        protocol = connection.protocol
+        self._rotate_frame = protocol.new_frame(Commands.GIMBAL_ROTATION, _ROTATION.size)
+        self._angle_frame = protocol.new_frame(Commands.CONTROL_ANGLE, _ANGLE.size)
+        self._angle_lock = threading.Lock()
     
     def center(self) -> bool:
         """
@@ -34,10 +82,10 @@ class SIYIGimbal:
         Returns:
             True if command sent successfully
         """
-        print("\n>> Centering gimbal...")
-        result = self.connection.send_packet(Commands.CENTER, b'\x01')
+        logger.debug("Centering gimbal...")
+        result = self.connection._send_raw(_FRAME_CENTER)
         if result:
-            print("[OK] Center command sent")
+            logger.info("Center command sent")
         return result
     
     def rotate(self, yaw: int, pitch: int) -> bool:
@@ -51,19 +99,67 @@ class SIYIGimbal:
         Returns:
             True if command sent successfully
         """
-        # Clamp values to valid range
-        yaw = max(-100, min(100, yaw))
-        pitch = max(-100, min(100, pitch))
+        with self._rotate_lock:
+            # A direct rotate supersedes any speeds rotate_rate_limited() is holding
+            self._pending_rotate = None
+            return self._send_rotate(yaw, pitch)
+    
+    def _send_rotate(self, yaw: int, pitch: int) -> bool:
+        """Build and send the rotation packet; called with _rotate_lock held"""
+        # Clamp values to valid range. They almost always are in range already,
+        # so check with plain comparisons before paying for min()/max() calls
+        if not (-100 <= yaw <= 100 and -100 <= pitch <= 100):
+            yaw = max(-100, min(100, yaw))
+            pitch = max(-100, min(100, pitch))
         
         # Pack as signed bytes (int8_t)
-        data = struct.pack('bb', yaw, pitch)
+        frame = self._rotate_frame
+        _ROTATION.pack_into(frame, self.connection.protocol.HEADER_LEN, yaw, pitch)
+        self.connection.protocol.finalize_into(frame)
         
-        print(f"\n>> Rotating gimbal (yaw={yaw}, pitch={pitch})...")
-        result = self.connection.send_packet(Commands.GIMBAL_ROTATION, data)
+        logger.debug("Rotating gimbal (yaw=%d, pitch=%d)...", yaw, pitch)
+        result = self.connection._send_raw(frame)
         if result:
-            print("[OK] Rotation command sent")
+            logger.debug("Rotation command sent")
         return result
     
+    def rotate_rate_limited(self, yaw: int, pitch: int, min_interval: float = 0.02) -> bool:
+        """
+        Rotate, sending at most one packet per min_interval
+        
+        Calls inside the interval replace the held speeds and a one-shot timer
+        sends the newest ones when the interval expires, so the last command
+        always reaches the gimbal.
+        
+        Args:
+            yaw: Yaw speed (-100 to 100)
+            pitch: Pitch speed (-100 to 100)
+            min_interval: Minimum time between rotation packets in seconds
+            
+        Returns:
+            True if the command was sent or queued
+        """
+        with self._rotate_lock:
+            wait = self._last_rotate_t + min_interval - time.monotonic()
+            if wait > 0 or self._rotate_timer is not None:
+                self._pending_rotate = (yaw, pitch)
+                if self._rotate_timer is None:
+                    self._rotate_timer = threading.Timer(wait, self._flush_rotate)
+                    self._rotate_timer.daemon = True
+                    self._rotate_timer.start()
+                return True
+            self._last_rotate_t = time.monotonic()
+            return self._send_rotate(yaw, pitch)
+    
+    def _flush_rotate(self):
+        """Timer callback: send the speeds held by rotate_rate_limited()"""
+        with self._rotate_lock:
+            pending, self._pending_rotate = self._pending_rotate, None
+            self._rotate_timer = None
+            self._last_rotate_t = time.monotonic()
+            if pending is not None:
+                self._send_rotate(*pending)
+    
     def control_angle(self, yaw: float, pitch: float) -> bool:
         """
         Set absolute gimbal angles
@@ -79,13 +175,16 @@ class SIYIGimbal:
         yaw_int = int(yaw * 10)
         pitch_int = int(pitch * 10)
         
-        # Pack as little-endian int16
-        data = struct.pack('<hh', yaw_int, pitch_int)
-        
-        print(f"\n>> Setting gimbal angle (yaw={yaw}°, pitch={pitch}°)...")
-        result = self.connection.send_packet(Commands.CONTROL_ANGLE, data)
+        logger.debug("Setting gimbal angle (yaw=%s°, pitch=%s°)...", yaw, pitch)
+        # Pack as little-endian int16; the lock keeps the shared frame intact
+        # until sendall() has copied it
+        with self._angle_lock:
+            frame = self._angle_frame
+            _ANGLE.pack_into(frame, self.connection.protocol.HEADER_LEN, yaw_int, pitch_int)
+            self.connection.protocol.finalize_into(frame)
+            result = self.connection._send_raw(frame)
         if result:
-            print("[OK] Angle control command sent")
+            logger.debug("Angle control command sent")
         return result
     
     def set_mode_lock(self) -> bool:
@@ -95,10 +194,10 @@ class SIYIGimbal:
         Returns:
             True if command sent successfully
         """
-        print("\n>> Setting Lock mode...")
-        result = self.connection.send_packet(Commands.CAPTURE_MODE, b'\x03')
+        logger.debug("Setting Lock mode...")
+        result = self.connection._send_raw(_FRAME_LOCK)
         if result:
-            print("[OK] Lock mode command sent")
+            logger.info("Lock mode command sent")
         return result
     
     def set_mode_follow(self) -> bool:
@@ -108,10 +207,10 @@ class SIYIGimbal:
         Returns:
             True if command sent successfully
         """
-        print("\n>> Setting Follow mode...")
-        result = self.connection.send_packet(Commands.CAPTURE_MODE, b'\x04')
+        logger.debug("Setting Follow mode...")
+        result = self.connection._send_raw(_FRAME_FOLLOW)
         if result:
-            print("[OK] Follow mode command sent")
+            logger.info("Follow mode command sent")
         return result
     
     def set_mode_fpv(self) -> bool:
@@ -121,10 +220,10 @@ class SIYIGimbal:
         Returns:
             True if command sent successfully
         """
-        print("\n>> Setting FPV mode...")
-        result = self.connection.send_packet(Commands.CAPTURE_MODE, b'\x05')
+        logger.debug("Setting FPV mode...")
+        result = self.connection._send_raw(_FRAME_FPV)
         if result:
-            print("[OK] FPV mode command sent")
+            logger.info("FPV mode command sent")
         return result
     
     def get_status(self, timeout: float = 2.0) -> dict:
@@ -137,20 +236,18 @@ class SIYIGimbal:
         Returns:
             Dictionary with status data or empty dict if failed
         """
-        print("\n>> Requesting gimbal status...")
+        logger.debug("Requesting gimbal status...")
         
-        if not self.connection.send_packet(Commands.STATUS_INFO, b'', need_ack=True):
+        reply = self.connection.send_request(Commands.STATUS_INFO)
+        if reply is None:
             return {}
         
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            response = self.connection.receive_packet(timeout=0.5)
-            if response and response['cmd_id'] == Commands.STATUS_INFO:
-                print(f"[OK] Status received: {response['data'].hex()}")
-                return {'raw_data': response['data']}
-            time.sleep(0.1)
+        response = self.connection.wait_reply(reply, timeout)
+        if response:
+            logger.info(f"Status received: {response['data'].hex()}")
+            return {'raw_data': response['data']}
         
-        print("[ERROR] No response received")
+        logger.warning("No gimbal status response received")
         return {}
     
     def get_attitude(self, timeout: float = 2.0) -> dict:
@@ -163,34 +260,69 @@ class SIYIGimbal:
         Returns:
             Dictionary with attitude data (yaw, pitch, roll) or empty dict if failed
         """
-        print("\n>> Requesting gimbal attitude...")
-        
-        if not self.connection.send_packet(Commands.ATTITUDE_DATA, b'', need_ack=True):
-            return {}
+        response = self._request_attitude(timeout)
+        if response:
+            if len(response['data']) >= _ATTITUDE.size:
+                attitude = self._parse_attitude(response).degrees()
+                logger.debug("Attitude: yaw=%s°, pitch=%s°, roll=%s°",
+                             attitude['yaw'], attitude['pitch'], attitude['roll'])
+                return attitude
+            else:
+                logger.info(f"Attitude (raw): {response['data'].hex()}")
+                return {'raw_data': response['data']}
         
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            response = self.connection.receive_packet(timeout=0.5)
-            if response and response['cmd_id'] == Commands.ATTITUDE_DATA:
-                # Parse attitude data (typically int16 values for yaw, pitch, roll)
-                if len(response['data']) >= 6:
-                    yaw, pitch, roll = struct.unpack('<hhh', response['data'][:6])
-                    # Convert from int16 to degrees (divide by 10)
-                    attitude = {
-                        'yaw': yaw / 10.0,
-                        'pitch': pitch / 10.0,
-                        'roll': roll / 10.0
-                    }
-                    print(f"[OK] Attitude: yaw={attitude['yaw']}°, pitch={attitude['pitch']}°, roll={attitude['roll']}°")
-                    return attitude
-                else:
-                    print(f"[OK] Attitude (raw): {response['data'].hex()}")
-                    return {'raw_data': response['data']}
-            time.sleep(0.1)
-        
-        print("[ERROR] No response received")
+        logger.warning("No gimbal attitude response received")
         return {}
     
+    def get_attitude_raw(self, timeout: float = 2.0) -> Optional[Attitude]:
+        """
+        Request gimbal attitude without building a dict or dividing
+        
+        For control loops polling attitude; call .degrees() when a human needs it.
+        
+        Args:
+            timeout: Response timeout in seconds
+            
+        Returns:
+            Attitude in tenths of a degree, or None if failed
+        """
+        response = self._request_attitude(timeout)
+        if response and len(response['data']) >= _ATTITUDE.size:
+            return self._parse_attitude(response)
+        return None
+    
+    @staticmethod
+    def _parse_attitude(response: dict) -> Attitude:
+        # Unpacks in place from the payload, no slice copy
+        return Attitude._make(_ATTITUDE.unpack_from(response['data']))
+    
+    def _request_attitude(self, timeout: float) -> Optional[dict]:
+        """Send an attitude request and return the newest attitude packet (or None)"""
+        logger.debug("Requesting gimbal attitude...")
+        
+        # Attitude packets that arrived unrequested before now are stale
+        self._latest_attitude_packet()
+        
+        reply = self.connection.send_request(Commands.ATTITUDE_DATA)
+        if reply is None:
+            return None
+        
+        response = self.connection.wait_reply(reply, timeout)
+        if response:
+            # The camera may have streamed newer attitudes behind the reply;
+            # a controller wants the most recent one
+            response = self._latest_attitude_packet() or response
+        return response
+    
+    def _latest_attitude_packet(self):
+        """Pop all queued attitude packets without waiting, return the newest (or None)"""
+        latest = None
+        while True:
+            packet = self.connection.receive_packet(Commands.ATTITUDE_DATA, timeout=0.0)
+            if not packet:
+                return latest
+            latest = packet
+    
     def get_working_mode(self, timeout: float = 2.0) -> str:
         """
         Request gimbal working mode
@@ -201,27 +333,25 @@ class SIYIGimbal:
         Returns:
             Working mode string or empty string if failed
         """
-        print("\n>> Requesting working mode...")
+        logger.debug("Requesting working mode...")
         
-        if not self.connection.send_packet(Commands.WORKING_MODE, b'', need_ack=True):
+        reply = self.connection.send_request(Commands.WORKING_MODE)
+        if reply is None:
             return ""
         
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            response = self.connection.receive_packet(timeout=0.5)
-            if response and response['cmd_id'] == Commands.WORKING_MODE:
-                if len(response['data']) > 0:
-                    mode_byte = response['data'][0]
-                    modes = {0x03: "Lock", 0x04: "Follow", 0x05: "FPV"}
-                    mode = modes.get(mode_byte, f"Unknown (0x{mode_byte:02X})")
-                    print(f"[OK] Working mode: {mode}")
-                    return mode
-                else:
-                    print(f"[OK] Working mode (raw): {response['data'].hex()}")
-                    return response['data'].hex()
-            time.sleep(0.1)
-        
-        print("[ERROR] No response received")
+        response = self.connection.wait_reply(reply, timeout)
+        if response:
+            if len(response['data']) > 0:
+                mode_byte = response['data'][0]
+                modes = {0x03: "Lock", 0x04: "Follow", 0x05: "FPV"}
+                mode = modes.get(mode_byte, f"Unknown (0x{mode_byte:02X})")
+                logger.info(f"Working mode: {mode}")
+                return mode
+            else:
+                logger.info(f"Working mode (raw): {response['data'].hex()}")
+                return response['data'].hex()
+        
+        logger.warning("No working mode response received")
         return ""
 
 
@@ -254,11 +384,9 @@ if __name__ == "__main__":
         
         # Test status
         gimbal.get_status()
-        time.sleep(1)
         
         # Test attitude
         gimbal.get_attitude()
-        time.sleep(1)
         
         conn.disconnect()
         
@@ -11,6 +11,56 @@ Implements the SIYI camera/gimbal communication protocol:
 import struct
 from typing import Optional, Tuple
 
+try:
+    from crcmod.predefined import mkPredefinedCrcFun
+    _crc16_native = mkPredefinedCrcFun('xmodem')
+except ImportError:
+    _crc16_native = None
+
+
+_HEADER = struct.Struct('<HBHHB')  # little-endian STX, CTRL, Data_len, SEQ, CMD_ID
+_U16 = struct.Struct('<H')
+_SEQ_OFFSET = 5  # After STX (2), CTRL (1) and Data_len (2)
+
+
+def _make_crc16_table() -> Tuple[int, ...]:
+    """CRC-16/XMODEM (poly 0x1021) remainder for every possible top byte"""
+    table = []
+    for byte in range(256):
+        crc = byte << 8
+        for _ in range(8):
+            # -1 & 0x1021 == 0x1021, 0 & 0x1021 == 0: XOR the poly iff the top bit was set
+            crc = ((crc << 1) ^ (0x1021 & -(crc >> 15))) & 0xFFFF
+        table.append(crc)
+    return tuple(table)
+
+
+_CRC16_TABLE = _make_crc16_table()
+
+# Slicing-by-8: _CRC16_SLICE_TABLES[k][b] is the CRC of byte b followed by k zero bytes
+_CRC16_SLICE_TABLES = [_CRC16_TABLE]
+for _ in range(7):
+    _CRC16_SLICE_TABLES.append(tuple(((c << 8) & 0xFF00) ^ _CRC16_TABLE[c >> 8]
+                                     for c in _CRC16_SLICE_TABLES[-1]))
+_CRC16_SLICE_TABLES = tuple(_CRC16_SLICE_TABLES)
+# Below this the extra unpacking costs more than the saved iterations
+_CRC16_SLICE_MIN_LEN = 16
+
+
+def _crc16_sliced(data, crc: int) -> int:
+    """CRC-16/XMODEM over data, 8 bytes per iteration, continuing from crc"""
+    t0, t1, t2, t3, t4, t5, t6, t7 = _CRC16_SLICE_TABLES
+    n = len(data)
+    i = 0
+    while i + 8 <= n:
+        b0, b1, b2, b3, b4, b5, b6, b7 = data[i:i + 8]
+        crc = (t7[b0 ^ (crc >> 8)] ^ t6[b1 ^ (crc & 0xFF)] ^ t5[b2] ^ t4[b3]
+               ^ t3[b4] ^ t2[b5] ^ t1[b6] ^ t0[b7])
+        i += 8
+    for byte in data[i:]:
+        crc = ((crc << 8) & 0xFF00) ^ t0[(crc >> 8) ^ byte]
+    return crc
+
 
 class SIYIProtocol:
     """SIYI Protocol packet builder and parser"""
@@ -19,29 +69,31 @@ class SIYIProtocol:
     STX = 0x6655  # Starting mark (low byte first)
     CTRL_NEED_ACK = 0x00
     CTRL_ACK_PACK = 0x01
+    HEADER_LEN = 8  # STX, CTRL, Data_len, SEQ, CMD_ID; DATA starts here
     
     def __init__(self):
         self.sequence = 0  # Frame sequence counter (0-65535)
     
-    def _calculate_crc16(self, data: bytes) -> int:
+    def _calculate_crc16(self, data: bytes, crc: int = 0) -> int:
         """
         Calculate CRC16 checksum for the data packet (CRC-16/XMODEM)
         
         Args:
             data: Complete packet data (without CRC16)
+            crc: CRC of the bytes before data, to checksum a packet in pieces
             
         Returns:
             CRC16 checksum value
         """
-        crc = 0
+        # crcmod's C extension when installed; XMODEM has no final XOR, so the
+        # running crc can be passed straight through as its start value
+        if _crc16_native is not None:
+            return _crc16_native(bytes(data), crc)
+        if len(data) >= _CRC16_SLICE_MIN_LEN:
+            return _crc16_sliced(data, crc)
+        table = _CRC16_TABLE
         for byte in data:
-            crc ^= (byte << 8)
-            for _ in range(8):
-                if crc & 0x8000:
-                    crc = (crc << 1) ^ 0x1021
-                else:
-                    crc = crc << 1
-                crc &= 0xFFFF
+            crc = ((crc << 8) & 0xFF00) ^ table[(crc >> 8) ^ byte]
         return crc
     
     def _get_next_sequence(self) -> int:
@@ -50,7 +102,8 @@ class SIYIProtocol:
         self.sequence = (self.sequence + 1) % 65536  # Wrap around at 65535
         return seq
     
-    def build_packet(self, cmd_id: int, data: bytes = b'', need_ack: bool = False) -> bytes:
+    def build_packet(self, cmd_id: int, data: bytes = b'', need_ack: bool = False,
+                     seq: Optional[int] = None) -> bytes:
         """
         Build a complete SIYI protocol packet
         
@@ -58,6 +111,8 @@ class SIYIProtocol:
             cmd_id: Command ID (1 byte)
             data: Data payload (optional)
             need_ack: Whether this packet needs acknowledgment
+            seq: Fixed sequence number (e.g. for frames built once at import);
+                 None takes the next one from the counter
             
         Returns:
             Complete packet with CRC16 checksum
@@ -69,43 +124,102 @@ class SIYIProtocol:
         data_len = len(data)
         
         # Sequence number
-        seq = self._get_next_sequence()
+        if seq is None:
+            seq = self._get_next_sequence()
         
-        # Build packet without CRC16
-        packet = struct.pack(
-            '<HBHHB',  # < = little-endian, H = uint16, B = uint8
+        # Lay header, data and CRC16 into one exact-size buffer (no concatenation)
+        end = self.HEADER_LEN + data_len
+        packet = bytearray(end + 2)
+        _HEADER.pack_into(
+            packet, 0,
             self.STX,   # Starting mark (2 bytes)
             ctrl,       # Control byte (1 byte)
             data_len,   # Data length (2 bytes)
             seq,        # Sequence (2 bytes)
             cmd_id      # Command ID (1 byte)
         )
-        
-        # Add data payload
-        packet += data
+        packet[self.HEADER_LEN:end] = data
         
         # Calculate and append CRC16 (low byte first)
-        crc16 = self._calculate_crc16(packet)
-        packet += struct.pack('<H', crc16)
+        crc16 = self._calculate_crc16(memoryview(packet)[:end])
+        _U16.pack_into(packet, end, crc16)
+        
+        return bytes(packet)
+    
+    def build_header(self, cmd_id: int, data_len: int, need_ack: bool = False) -> bytes:
+        """
+        Build just the 8-byte header of a packet, taking the next sequence number
+        
+        For gathered sends: header, payload and build_crc() go out as separate
+        buffers instead of one concatenated packet.
+        
+        Args:
+            cmd_id: Command ID (1 byte)
+            data_len: Payload length in bytes
+            need_ack: Whether this packet needs acknowledgment
+            
+        Returns:
+            Packet header
+        """
+        ctrl = self.CTRL_NEED_ACK if need_ack else self.CTRL_ACK_PACK
+        return _HEADER.pack(self.STX, ctrl, data_len, self._get_next_sequence(), cmd_id)
+    
+    def build_crc(self, header: bytes, data: bytes = b'') -> bytes:
+        """CRC16 trailer for header + data, computed without joining them"""
+        return _U16.pack(self._calculate_crc16(data, self._calculate_crc16(header)))
+    
+    def new_frame(self, cmd_id: int, data_len: int, need_ack: bool = False) -> bytearray:
+        """
+        Preallocate a packet whose payload is rewritten in place on every send
+        
+        The header is laid down once. Pack the payload at HEADER_LEN, then call
+        finalize_into() before each send.
         
-        return packet
+        Args:
+            cmd_id: Command ID (1 byte)
+            data_len: Payload length in bytes
+            need_ack: Whether this packet needs acknowledgment
+            
+        Returns:
+            Packet buffer with header and room for payload and CRC16
+        """
+        ctrl = self.CTRL_NEED_ACK if need_ack else self.CTRL_ACK_PACK
+        frame = bytearray(self.HEADER_LEN + data_len + 2)
+        _HEADER.pack_into(frame, 0, self.STX, ctrl, data_len, 0, cmd_id)
+        return frame
+    
+    def finalize_into(self, frame: bytearray) -> bytearray:
+        """
+        Stamp the next sequence number and the CRC16 into a new_frame() packet
+        
+        Args:
+            frame: Packet from new_frame() with its payload filled in
+            
+        Returns:
+            The same frame, ready to send
+        """
+        _U16.pack_into(frame, _SEQ_OFFSET, self._get_next_sequence())
+        crc_at = len(frame) - 2
+        _U16.pack_into(frame, crc_at, self._calculate_crc16(memoryview(frame)[:crc_at]))
+        return frame
     
     def parse_packet(self, packet: bytes) -> Optional[dict]:
         """
         Parse a received SIYI protocol packet
         
         Args:
-            packet: Raw packet bytes
+            packet: Raw packet bytes, or a memoryview into a receive buffer
             
         Returns:
-            Dictionary with parsed fields or None if invalid
+            Dictionary with parsed fields or None if invalid. 'data' is always
+            a bytes copy, so it stays valid after the buffer is reused.
         """
         if len(packet) < 10:  # Minimum packet size
             return None
         
         # Extract header (8 bytes)
         try:
-            stx, ctrl, data_len, seq, cmd_id = struct.unpack('<HBHHB', packet[:8])
+            stx, ctrl, data_len, seq, cmd_id = _HEADER.unpack_from(packet, 0)
         except struct.error:
             return None
         
@@ -118,14 +232,17 @@ class SIYIProtocol:
         if len(packet) < expected_len:
             return None
         
-        data = packet[8:8+data_len]
-        received_crc16 = struct.unpack('<H', packet[8+data_len:8+data_len+2])[0]
+        # Views, so bytes input isn't copied before the CRC check
+        view = memoryview(packet)
+        received_crc16 = _U16.unpack_from(view, 8 + data_len)[0]
         
         # Verify CRC16
-        calculated_crc16 = self._calculate_crc16(packet[:8+data_len])
+        calculated_crc16 = self._calculate_crc16(view[:8+data_len])
         if received_crc16 != calculated_crc16:
             return None
         
+        data = bytes(view[8:8+data_len])
+        
         return {
             'ctrl': ctrl,
             'data_len': data_len,
@@ -9,9 +9,21 @@ Handles zoom operations:
 """
 
 from .siyi_connection import SIYIConnection
-from .siyi_protocol import Commands
+from .siyi_protocol import SIYIProtocol, Commands
 import struct
 import time
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Start/stop zoom frames never change; built once (seq 0)
+_protocol = SIYIProtocol()
+_FRAME_ZOOM_IN = _protocol.build_packet(Commands.MANUAL_ZOOM, b'\x01', seq=0)
+_FRAME_ZOOM_OUT = _protocol.build_packet(Commands.MANUAL_ZOOM, b'\xFF', seq=0)
+_FRAME_ZOOM_STOP = _protocol.build_packet(Commands.MANUAL_ZOOM, b'\x00', seq=0)
+
+# ABSOLUTE_ZOOM payload: 10 pad bytes, integer and tenths of the zoom, 4 pad bytes
+_ABS_ZOOM = struct.Struct('<10xBB4x')
 
 
 class SIYIZoom:
@@ -30,33 +42,33 @@ class SIYIZoom:
         """
         Start zooming in (Continuous)
         """
-        print("\n→ Start zooming in...")
+        logger.debug("Start zooming in...")
         # Manual says 1: Start zooming in
-        result = self.connection.send_packet(Commands.MANUAL_ZOOM, b'\x01')
+        result = self.connection._send_raw(_FRAME_ZOOM_IN)
         if result:
-            print("✓ Zoom in command sent")
+            logger.info("Zoom in command sent")
         return result
     
     def zoom_out(self) -> bool:
         """
         Start zooming out (Continuous)
         """
-        print("\n→ Start zooming out...")
+        logger.debug("Start zooming out...")
         # Manual says -1 (0xFF): Start zooming out
-        result = self.connection.send_packet(Commands.MANUAL_ZOOM, b'\xFF')
+        result = self.connection._send_raw(_FRAME_ZOOM_OUT)
         if result:
-            print("✓ Zoom out command sent")
+            logger.info("Zoom out command sent")
         return result
 
     def stop_zoom(self) -> bool:
         """
         Stop zooming
         """
-        print("\n→ Stop zooming...")
+        logger.debug("Stop zooming...")
         # Manual says 0: Stop zooming
-        result = self.connection.send_packet(Commands.MANUAL_ZOOM, b'\x00')
+        result = self.connection._send_raw(_FRAME_ZOOM_STOP)
         if result:
-            print("✓ Stop zoom command sent")
+            logger.info("Stop zoom command sent")
         return result
     
     # Deprecated manual_zoom_in/out if they were doing something different
@@ -84,14 +96,12 @@ class SIYIZoom:
         decimal_part = int((zoom_level - integer_part) * 10)
         
         # Pack as 16 bytes with zoom data
-        data = b'\x00' * 10  # Padding
-        data += struct.pack('BB', integer_part, decimal_part)
-        data += b'\x00' * 4  # More padding
+        data = _ABS_ZOOM.pack(integer_part, decimal_part)
         
-        print(f"\n→ Setting absolute zoom to {zoom_level}X...")
+        logger.debug(f"Setting absolute zoom to {zoom_level}X...")
         result = self.connection.send_packet(Commands.ABSOLUTE_ZOOM, data)
         if result:
-            print(f"✓ Absolute zoom command sent ({zoom_level}X)")
+            logger.info(f"Absolute zoom command sent ({zoom_level}X)")
         return result
     
     def get_max_zoom(self, timeout: float = 2.0) -> float:
@@ -104,28 +114,26 @@ class SIYIZoom:
         Returns:
             Maximum zoom value or 0.0 if failed
         """
-        print("\n→ Requesting max zoom value...")
+        logger.debug("Requesting max zoom value...")
         
-        if not self.connection.send_packet(Commands.MAX_ZOOM_VALUE, b'', need_ack=True):
+        reply = self.connection.send_request(Commands.MAX_ZOOM_VALUE)
+        if reply is None:
             return 0.0
         
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            response = self.connection.receive_packet(timeout=0.5)
-            if response and response['cmd_id'] == Commands.MAX_ZOOM_VALUE:
-                if len(response['data']) >= 2:
-                    # Parse zoom value (typically integer and decimal parts)
-                    integer_part = response['data'][0]
-                    decimal_part = response['data'][1] if len(response['data']) > 1 else 0
-                    max_zoom = integer_part + (decimal_part / 10.0)
-                    print(f"✓ Max zoom: {max_zoom}X")
-                    return max_zoom
-                else:
-                    print(f"✓ Max zoom (raw): {response['data'].hex()}")
-                    return 0.0
-            time.sleep(0.1)
-        
-        print("✗ No response received")
+        response = self.connection.wait_reply(reply, timeout)
+        if response:
+            if len(response['data']) >= 2:
+                # Parse zoom value (typically integer and decimal parts)
+                integer_part = response['data'][0]
+                decimal_part = response['data'][1] if len(response['data']) > 1 else 0
+                max_zoom = integer_part + (decimal_part / 10.0)
+                logger.info(f"Max zoom: {max_zoom}X")
+                return max_zoom
+            else:
+                logger.info(f"Max zoom (raw): {response['data'].hex()}")
+                return 0.0
+        
+        logger.warning("No max zoom response received")
         return 0.0
     
     def get_current_zoom(self, timeout: float = 2.0) -> float:
@@ -138,28 +146,26 @@ class SIYIZoom:
         Returns:
             Current zoom value or 0.0 if failed
         """
-        print("\n→ Requesting current zoom value...")
+        logger.debug("Requesting current zoom value...")
         
-        if not self.connection.send_packet(Commands.CURRENT_ZOOM_VALUE, b'', need_ack=True):
+        reply = self.connection.send_request(Commands.CURRENT_ZOOM_VALUE)
+        if reply is None:
             return 0.0
         
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            response = self.connection.receive_packet(timeout=0.5)
-            if response and response['cmd_id'] == Commands.CURRENT_ZOOM_VALUE:
-                if len(response['data']) >= 2:
-                    # Parse zoom value (typically integer and decimal parts)
-                    integer_part = response['data'][0]
-                    decimal_part = response['data'][1] if len(response['data']) > 1 else 0
-                    current_zoom = integer_part + (decimal_part / 10.0)
-                    print(f"✓ Current zoom: {current_zoom}X")
-                    return current_zoom
-                else:
-                    print(f"✓ Current zoom (raw): {response['data'].hex()}")
-                    return 0.0
-            time.sleep(0.1)
-        
-        print("✗ No response received")
+        response = self.connection.wait_reply(reply, timeout)
+        if response:
+            if len(response['data']) >= 2:
+                # Parse zoom value (typically integer and decimal parts)
+                integer_part = response['data'][0]
+                decimal_part = response['data'][1] if len(response['data']) > 1 else 0
+                current_zoom = integer_part + (decimal_part / 10.0)
+                logger.info(f"Current zoom: {current_zoom}X")
+                return current_zoom
+            else:
+                logger.info(f"Current zoom (raw): {response['data'].hex()}")
+                return 0.0
+        
+        logger.warning("No current zoom response received")
         return 0.0
 
 
@@ -176,11 +182,9 @@ if __name__ == "__main__":
         
         # Get current zoom
         current = zoom.get_current_zoom()
-        time.sleep(1)
         
         # Get max zoom
         max_zoom = zoom.get_max_zoom()
-        time.sleep(1)
         
         # Test zoom in
         zoom.zoom_in()
@@ -191,8 +195,9 @@ if __name__ == "__main__":
         time.sleep(2)
         
         # Test absolute zoom
-        zoom.set_absolute_zoom(4.5)
-        time.sleep(2)
+        ack = conn.expect(Commands.ABSOLUTE_ZOOM)
+        if zoom.set_absolute_zoom(4.5):
+            conn.wait_reply(ack, 2.0)
         
         conn.disconnect()
         
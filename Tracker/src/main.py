@@ -16,12 +16,12 @@ def main():
 
     # Override config with args
     if args.headless:
-        cfg._config['system']['headless'] = True
+        cfg.set('system.headless', True)
     elif args.mode == 'debug' and not os.environ.get('DISPLAY'):
         print("[INFO] No DISPLAY variable set. Assuming attached monitor at :0")
         os.environ["DISPLAY"] = ":0"
     
-    cfg._config['system']['mode'] = args.mode
+    cfg.set('system.mode', args.mode)
 
     if args.mode == 'production':
         print("[INFO] Starting in Production Mode (API Server)")
@@ -3,6 +3,16 @@ import os
 import sys
 from logging.handlers import RotatingFileHandler
 
+_LOG_DIR = None
+
+def _log_dir():
+    # Resolved and created once; every module's get_logger() shares it
+    global _LOG_DIR
+    if _LOG_DIR is None:
+        _LOG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'logs')
+        os.makedirs(_LOG_DIR, exist_ok=True)
+    return _LOG_DIR
+
 def get_logger(name):
     logger = logging.getLogger(name)
     
@@ -20,10 +30,8 @@ def get_logger(name):
         logger.addHandler(ch)
         
         # File Handler
-        log_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'logs')
-        os.makedirs(log_dir, exist_ok=True)
         fh = RotatingFileHandler(
-            os.path.join(log_dir, 'tracker.log'), 
+            os.path.join(_log_dir(), 'tracker.log'), 
             maxBytes=10*1024*1024, 
             backupCount=5
         )
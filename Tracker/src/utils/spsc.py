@@ -0,0 +1,106 @@
+import queue
+import threading
+import time
+
+class SPSCRing:
+    """
+    Bounded ring for exactly one producer thread and one consumer thread.
+    Drop-in for the queue.Queue put/get calls used by the pipeline (raises
+    queue.Full / queue.Empty the same way). The fast path takes no locks: the
+    producer only advances _tail, the consumer only advances _head, and the
+    GIL makes each slot write and index update atomic. Events are only used
+    to sleep when the ring is empty/full.
+    """
+    def __init__(self, capacity=4):
+        if capacity < 1 or capacity & (capacity - 1):
+            raise ValueError(f"capacity must be a power of two, got {capacity}")
+        self._buf = [None] * capacity
+        self._mask = capacity - 1
+        self._capacity = capacity
+        self._head = 0  # next slot to read (consumer owned)
+        self._tail = 0  # next slot to write (producer owned)
+        # Set by push_overwrite(); the producer may then lap the consumer
+        self._overwrite = False
+        self._not_empty = threading.Event()
+        self._not_full = threading.Event()
+        self._not_full.set()
+
+    def qsize(self):
+        size = self._tail - self._head
+        if self._overwrite and size >= self._capacity:
+            # get() skips to tail - capacity + 1 once lapped
+            return self._capacity - 1
+        return size
+
+    def empty(self):
+        return self._tail == self._head
+
+    def full(self):
+        return self._tail - self._head >= self._capacity
+
+    def put(self, item, block=True, timeout=None):
+        if self.full():
+            if not block:
+                raise queue.Full
+            self._wait(self._not_full, self.full, timeout, queue.Full)
+        self._buf[self._tail & self._mask] = item
+        self._tail += 1
+        # Skip the Event's internal lock when the consumer isn't waiting
+        if not self._not_empty.is_set():
+            self._not_empty.set()
+
+    def push_overwrite(self, item):
+        """
+        Producer-side put that never blocks or raises: when the ring is full the
+        oldest unread items are dropped, so the consumer always sees the newest.
+        """
+        if self._capacity < 2:
+            raise ValueError("push_overwrite needs capacity >= 2")
+        self._overwrite = True
+        self._buf[self._tail & self._mask] = item
+        self._tail += 1
+        if not self._not_empty.is_set():
+            self._not_empty.set()
+
+    def get(self, block=True, timeout=None):
+        if self.empty():
+            if not block:
+                raise queue.Empty
+            self._wait(self._not_empty, self.empty, timeout, queue.Empty)
+        if self._overwrite:
+            item = self._get_lapped()
+        else:
+            idx = self._head & self._mask
+            item = self._buf[idx]
+            self._buf[idx] = None
+            self._head += 1
+        if not self._not_full.is_set():
+            self._not_full.set()
+        return item
+
+    def _get_lapped(self):
+        # The producer may have lapped us, and the oldest slot may be rewritten while
+        # we read it. Skip to the oldest slot that is safe, then confirm the producer
+        # didn't move on mid-read.
+        while True:
+            tail = self._tail
+            head = self._head
+            if tail - head >= self._capacity:
+                head = tail - self._capacity + 1
+            item = self._buf[head & self._mask]
+            if self._tail - head < self._capacity:
+                self._head = head + 1
+                return item
+
+    @staticmethod
+    def _wait(event, blocked, timeout, exc):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while blocked():
+            event.clear()
+            # Re-check after clearing so a set() that raced the clear isn't lost
+            if not blocked():
+                return
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                raise exc
+            event.wait(remaining)
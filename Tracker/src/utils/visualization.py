@@ -1,39 +1,88 @@
 import cv2
+from collections import namedtuple
+from functools import lru_cache
 
-def draw_detections(frame, detections):
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+# A deferred drawing call: kind selects the cv2 function, args follow the image
+Primitive = namedtuple('Primitive', 'kind args')
+
+_DRAW_FNS = {
+    'rect': cv2.rectangle,
+    'circle': cv2.circle,
+    'line': cv2.line,
+    'text': cv2.putText,
+}
+
+def draw_all(frame, primitives):
+    """
+    Apply a list of primitives to the frame in a single pass.
+    """
+    draw_fns = _DRAW_FNS
+    for kind, args in primitives:
+        draw_fns[kind](frame, *args)
+
+def detection_primitives(labels, confs, boxes):
+    """
+    Primitives for detection boxes.
+    labels: (N,), confs: (N,), boxes: (N, 4) x,y,w,h
+    """
+    primitives = []
+    for label, conf, (x, y, w, h) in zip(labels, confs.tolist(), boxes.tolist()):
+        primitives.append(Primitive('rect', ((x, y), (x + w, y + h), (0, 165, 255), 2)))
+        primitives.append(Primitive('text', (f"{label}: {conf:.2f}", (x, y - 10),
+                                             FONT, 0.5, (0, 165, 255), 2)))
+    return primitives
+
+def tracking_primitives(bbox, center_x, center_y, error_x, error_y):
+    """
+    Primitives for the tracking box and error info.
+    """
+    x, y, w, h = int(bbox[0]), int(bbox[1]), int(bbox[2]), int(bbox[3])
+    target_x = x + w // 2
+    target_y = y + h // 2
+
+    return [
+        # Box
+        Primitive('rect', ((x, y), (x + w, y + h), (0, 255, 0), 2)),
+        # Center points
+        Primitive('circle', ((target_x, target_y), 5, (0, 255, 0), -1)),
+        Primitive('circle', ((center_x, center_y), 5, (0, 0, 255), -1)),
+        # Line
+        Primitive('line', ((center_x, center_y), (target_x, target_y), (255, 255, 0), 2)),
+        # Text
+        Primitive('text', (f"Err: {error_x},{error_y}", (10, 30),
+                           FONT, 0.6, (0, 255, 255), 2)),
+    ]
+
+# The mode changes a handful of times per run; don't rebuild its label per frame
+@lru_cache(maxsize=8)
+def _mode_label(mode):
+    return f"Mode: {mode.upper()}"
+
+def hud_primitives(frame, mode, fps):
+    frame_h, frame_w = frame.shape[:2]
+    return [
+        Primitive('text', (_mode_label(mode), (10, frame_h - 20),
+                           FONT, 0.6, (200, 200, 200), 2)),
+        Primitive('text', (f"FPS: {fps:.1f}", (frame_w - 120, frame_h - 20),
+                           FONT, 0.6, (200, 200, 200), 2)),
+    ]
+
+def draw_detections(frame, labels, confs, boxes):
     """
     Draw detection boxes.
-    detections: [(label, conf, (x,y,w,h)), ...]
+    labels: (N,), confs: (N,), boxes: (N, 4) x,y,w,h
     """
-    for label, conf, (x, y, w, h) in detections:
-        cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 165, 255), 2)
-        cv2.putText(frame, f"{label}: {conf:.2f}", (x, y - 10),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 165, 255), 2)
+    draw_all(frame, detection_primitives(labels, confs, boxes))
 
 def draw_tracking_info(frame, bbox, center_x, center_y, error_x, error_y):
     """
     Draw tracking box and error info.
     """
-    x, y, w, h = [int(v) for v in bbox]
-    target_x = x + w // 2
-    target_y = y + h // 2
+    draw_all(frame, tracking_primitives(bbox, center_x, center_y, error_x, error_y))
 
-    # Box
-    cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
-    
-    # Center points
-    cv2.circle(frame, (target_x, target_y), 5, (0, 255, 0), -1)
-    cv2.circle(frame, (center_x, center_y), 5, (0, 0, 255), -1)
-    
-    # Line
-    cv2.line(frame, (center_x, center_y), (target_x, target_y), (255, 255, 0), 2)
-    
-    # Text
-    cv2.putText(frame, f"Err: {error_x},{error_y}", (10, 30), 
-               cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
-
-def draw_hud(frame, mode, fps):
-    cv2.putText(frame, f"Mode: {mode.upper()}", (10, frame.shape[0] - 20), 
-               cv2.FONT_HERSHEY_SIMPLEX, 0.6, (200, 200, 200), 2)
-    cv2.putText(frame, f"FPS: {fps:.1f}", (frame.shape[1] - 120, frame.shape[0] - 20), 
-               cv2.FONT_HERSHEY_SIMPLEX, 0.6, (200, 200, 200), 2)
+def draw_hud(frame, mode, fps, show=True):
+    if not show:
+        return
+    draw_all(frame, hud_primitives(frame, mode, fps))
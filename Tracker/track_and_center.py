@@ -11,49 +11,12 @@ import threading
 import queue
 import numpy as np
 
-# Add parent directory to path to import siyi_sdk
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-
-from siyi_sdk import SIYISDK
-
-class PIDController:
-    def __init__(self, kp, ki, kd, output_limits=(-100, 100)):
-        self.kp = kp
-        self.ki = ki
-        self.kd = kd
-        self.min_out, self.max_out = output_limits
-        
-        self.prev_error = 0
-        self.integral = 0
-        self.last_time = None
-
-    def update(self, error):
-        current_time = time.time()
-        
-        if self.last_time is None:
-            self.last_time = current_time
-            dt = 0.0
-        else:
-            dt = current_time - self.last_time
-            
-        self.last_time = current_time
-
-        p_term = self.kp * error
-        self.integral += error * dt
-        i_term = self.ki * self.integral
-
-        d_term = 0
-        if dt > 0:
-            d_term = self.kd * (error - self.prev_error) / dt
-        
-        self.prev_error = error
-        output = p_term + i_term + d_term
-        return max(min(output, self.max_out), self.min_out)
+# Tracker root on the path so the src package imports when run from elsewhere
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-    def reset(self):
-        self.prev_error = 0
-        self.integral = 0
-        self.last_time = None
+from src.hardware.gstreamer import open_h265_capture
+from src.hardware.siyi_sdk import SIYISDK
+from src.utils.pid import PIDController
 
 class LatestFrameReader:
     """
@@ -64,8 +27,10 @@ class LatestFrameReader:
         self.cap = cap
         self.frame = None
         self.ret = False
+        # Incremented per successfully read frame; cond is notified on each one
+        self.frame_id = 0
         self.running = False
-        self.lock = threading.Lock()
+        self.cond = threading.Condition()
         self.thread = None
 
     def start(self):
@@ -77,21 +42,92 @@ class LatestFrameReader:
 
     def _update(self):
         while self.running:
+            # cap.read() blocks (without the GIL) until the next frame
             ret, frame = self.cap.read()
-            with self.lock:
+            with self.cond:
                 self.ret = ret
                 self.frame = frame
-            time.sleep(0.001) # Slight yield
+                if ret:
+                    self.frame_id += 1
+                self.cond.notify_all()
+            if not ret:
+                time.sleep(0.01)  # Stream down; don't spin on failed reads
 
     def read(self):
-        with self.lock:
-            return self.ret, self.frame
+        """
+        Returns (ret, frame, frame_id) without waiting.
+        """
+        with self.cond:
+            return self.ret, self.frame, self.frame_id
+
+    def read_blocking(self, timeout=None, last_id=None):
+        """
+        Wait up to timeout seconds for a frame newer than last_id (default: the
+        current one), then return (ret, frame, frame_id) like read().
+        """
+        with self.cond:
+            seen = self.frame_id if last_id is None else last_id
+            self.cond.wait_for(lambda: self.frame_id != seen, timeout)
+            return self.ret, self.frame, self.frame_id
 
     def stop(self):
         self.running = False
         if self.thread:
             self.thread.join()
 
+def _create_tracker():
+    try:
+        return cv2.TrackerCSRT_create()
+    except AttributeError:
+        return cv2.TrackerKCF_create()
+
+class WindowedTracker:
+    """
+    Runs the OpenCV tracker on a padded window around the target instead of the
+    whole frame, so its feature extraction only touches that sub-image.
+    The tracker's state is in window coordinates, so the window stays put while
+    the target is well inside it and is re-centred (re-initialising the
+    tracker) once the box drifts near an edge that isn't the frame's.
+    """
+    def __init__(self):
+        self.tracker = None
+        self.roi = None
+        self.margin = 0
+
+    def init(self, frame, bbox):
+        frame_h, frame_w = frame.shape[:2]
+        x, y, w, h = bbox
+        x = max(0, x)
+        y = max(0, y)
+        pad = max(w, h)
+        rx = max(0, x - pad)
+        ry = max(0, y - pad)
+        rw = min(frame_w - rx, w + 2 * pad)
+        rh = min(frame_h - ry, h + 2 * pad)
+        self.roi = (rx, ry, rw, rh)
+        self.margin = pad // 2
+        self.tracker = _create_tracker()
+        self.tracker.init(frame[ry:ry + rh, rx:rx + rw], (x - rx, y - ry, w, h))
+
+    def update(self, frame):
+        """
+        Returns (success, (x, y, w, h)) in full-frame coordinates.
+        """
+        rx, ry, rw, rh = self.roi
+        success, box = self.tracker.update(frame[ry:ry + rh, rx:rx + rw])
+        if not success:
+            return False, box
+        bx, by, bw, bh = int(box[0]), int(box[1]), int(box[2]), int(box[3])
+        x = bx + rx
+        y = by + ry
+        frame_h, frame_w = frame.shape[:2]
+        m = self.margin
+        if ((bx < m and rx > 0) or (by < m and ry > 0) or
+                (rw - bx - bw < m and rx + rw < frame_w) or
+                (rh - by - bh < m and ry + rh < frame_h)):
+            self.init(frame, (x, y, bw, bh))
+        return True, (x, y, bw, bh)
+
 def track_and_center(
     rtsp_url="rtsp://192.168.144.25:8554/main.264",
     camera_ip="192.168.144.25", 
@@ -99,7 +135,8 @@ def track_and_center(
     kp=0.15,
     ki=0.01,
     kd=0.005,
-    deadzone=20
+    deadzone=20,
+    decoder="auto"
 ):
     print("="*60)
     print("SIYI Object Tracking & Gymbal Centering (PID + Low Latency)")
@@ -118,14 +155,17 @@ def track_and_center(
 
     # 2. Open Video Stream (H.265 optimized)
     print(f"[INFO] Opening Stream: {rtsp_url}")
-    # optimized pipeline: appsink drop=true max-buffers=1
-    gst_pipeline = f"rtspsrc location={rtsp_url} latency=0 ! rtph265depay ! h265parse ! avdec_h265 ! videoconvert ! appsink drop=true max-buffers=1"
+    # optimized pipeline: hardware H.265 decode when available, appsink drop=true max-buffers=1.
+    # The appsink takes the decoder's NV12 as-is; cv2.cvtColor does the BGR conversion
+    # (SIMD, multi-threaded) instead of a software videoconvert inside the pipeline.
+    cap, used_decoder = open_h265_capture(rtsp_url, decoder=decoder, fmt="NV12")
+    nv12 = cap is not None
     
-    cap = cv2.VideoCapture(gst_pipeline, cv2.CAP_GSTREAMER)
-    
-    if not cap.isOpened():
+    if cap is None:
         print("[WARNING] GStreamer failed, falling back to default backend...")
         cap = cv2.VideoCapture(rtsp_url)
+    else:
+        print(f"[INFO] Decoding with {used_decoder}")
     
     if not cap.isOpened():
         print("[ERROR] Failed to open video stream")
@@ -140,10 +180,9 @@ def track_and_center(
     # Wait for first frame
     print("[INFO] Waiting for first frame...")
     for _ in range(100):
-        ret, frame = reader.read()
+        ret, frame, _ = reader.read_blocking(0.1)
         if ret:
             break
-        time.sleep(0.1)
     
     if not ret:
         print("[ERROR] Cannot read video frame")
@@ -161,19 +200,41 @@ def track_and_center(
     pid_yaw = PIDController(kp, ki, kd, output_limits=(-100, 100))
     pid_pitch = PIDController(kp, ki, kd, output_limits=(-100, 100))
     
+    if nv12:
+        frame = cv2.cvtColor(frame, cv2.COLOR_YUV2BGR_NV12)
     frame_h, frame_w = frame.shape[:2]
     center_x, center_y = frame_w // 2, frame_h // 2
 
     last_ctrl_time = 0
     ctrl_interval = 0.05 
+    last_frame_id = 0
+
+    # Unchanged speeds are only re-sent as a keepalive every rotate_keepalive seconds
+    last_rotate = None
+    last_rotate_time = 0
+    rotate_keepalive = 0.2
+
+    def send_rotate(yaw, pitch, now):
+        nonlocal last_rotate, last_rotate_time
+        if (yaw, pitch) == last_rotate and now - last_rotate_time < rotate_keepalive:
+            return
+        sdk.rotate_gimbal(yaw, pitch)
+        last_rotate = (yaw, pitch)
+        last_rotate_time = now
 
     try:
         while True:
-            # Always get latest frame
-            ret, frame = reader.read()
-            if not ret:
-                time.sleep(0.01)
+            # Always get latest frame; returns at once if one arrived since the last pass
+            ret, frame, frame_id = reader.read_blocking(0.02, last_frame_id)
+            if not ret or frame_id == last_frame_id:
+                # Nothing new: skip tracker/PID, just keep the window responsive
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    break
                 continue
+            last_frame_id = frame_id
+            if nv12:
+                # (h * 3/2, w) Y plane + interleaved UV -> (h, w, 3) BGR
+                frame = cv2.cvtColor(frame, cv2.COLOR_YUV2BGR_NV12)
 
             # Draw center
             cv2.circle(frame, (center_x, center_y), 5, (0, 0, 255), -1)
@@ -182,7 +243,7 @@ def track_and_center(
                 success, box = tracker.update(frame)
 
                 if success:
-                    x, y, w, h = [int(v) for v in box]
+                    x, y, w, h = box  # WindowedTracker already returns ints
                     target_x = x + w // 2
                     target_y = y + h // 2
 
@@ -208,12 +269,9 @@ def track_and_center(
                         pid_pitch.reset()
 
                     # Send command periodically
-                    now = time.time()
+                    now = time.monotonic()
                     if now - last_ctrl_time > ctrl_interval:
-                        if yaw_speed != 0 or pitch_speed != 0:
-                            sdk.rotate_gimbal(yaw_speed, pitch_speed)
-                        else:
-                            sdk.rotate_gimbal(0, 0)
+                        send_rotate(yaw_speed, pitch_speed, now)
                         last_ctrl_time = now
 
                     cv2.putText(frame, f"Err: {error_x},{error_y}", (10, 30), 
@@ -226,9 +284,10 @@ def track_and_center(
                     pid_yaw.reset()
                     pid_pitch.reset()
                     
-                    if time.time() - last_ctrl_time > ctrl_interval:
-                         sdk.rotate_gimbal(0, 0)
-                         last_ctrl_time = time.time()
+                    now = time.monotonic()
+                    if now - last_ctrl_time > ctrl_interval:
+                         send_rotate(0, 0, now)
+                         last_ctrl_time = now
             else:
                 cv2.putText(frame, "Press 's' to select object", (10, 30), 
                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
@@ -251,17 +310,15 @@ def track_and_center(
                 print("[INFO] Pausing for object selection...")
                 # Stop gimbal before selection
                 sdk.rotate_gimbal(0, 0)
+                last_rotate = (0, 0)
+                last_rotate_time = time.monotonic()
                 
                 # Select ROI on current frame
                 bbox = cv2.selectROI("Tracking & Centering (PID + LowLatency)", frame, fromCenter=False, showCrosshair=True)
                 
                 if bbox != (0, 0, 0, 0):
                     print("[INFO] Object selected, initializing tracker...")
-                    try:
-                        tracker = cv2.TrackerCSRT_create()
-                    except AttributeError:
-                        tracker = cv2.TrackerKCF_create()
-                    
+                    tracker = WindowedTracker()
                     tracker.init(frame, bbox)
                     pid_yaw.reset()
                     pid_pitch.reset()